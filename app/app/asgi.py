@@ -0,0 +1,14 @@
+"""
+ASGI config for app project.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+to be served by an ASGI server, e.g. ``uvicorn app.asgi:application``.
+"""
+
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+from core.asgi import get_asgi_application  # noqa: E402
+
+application = get_asgi_application()
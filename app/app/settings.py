@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.1/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -41,9 +42,13 @@ INSTALLED_APPS = [
     'core',
     'user',
     'recipe',
+    'benchmark',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.AdmissionControlMiddleware',
+    'core.middleware.QueryInstrumentationMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,13 +81,195 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
 
-DATABASES = {
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db.backends.postgresql' if DB_POOL_SIZE
+            else 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'app'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # pooled connections go back to the pool at the end of every
+            # request, unpooled ones are kept open by each thread
+            'CONN_MAX_AGE': 0 if DB_POOL_SIZE
+            else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'OPTIONS': {
+                'connect_timeout': int(
+                    os.environ.get('DB_CONNECT_TIMEOUT', 5)
+                ),
+            },
+            'POOL': {
+                'MAX_SIZE': DB_POOL_SIZE,
+                'MAX_IDLE': int(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+                'CHECK_INTERVAL': int(
+                    os.environ.get('DB_POOL_CHECK_INTERVAL', 30)
+                ),
+                'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get(
+                'DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3'),
+            ),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'OPTIONS': {
+                # seconds to wait for a lock held by another connection
+                'timeout': int(os.environ.get('DB_LOCK_TIMEOUT', 20)),
+            },
+        }
+    }
+
+# Comma separated replica hosts (PostgreSQL) or files (SQLite), see
+# core.db.router
+DATABASE_REPLICAS = []
+
+for index, replica in enumerate(
+        filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica_{index}'] = dict(
+        DATABASES['default'],
+        TEST={'MIRROR': 'default'},
+        **{'HOST' if DB_ENGINE == 'postgres' else 'NAME': replica}
+    )
+    DATABASE_REPLICAS.append(f'replica_{index}')
+
+DATABASE_ROUTERS = ['core.db.router.ReplicaRouter']
+
+# How long reads stay on the primary after a user writes, must exceed the
+# replication lag
+READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))
+
+# Applied to every new SQLite connection, see core.db.sqlite
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+        },
     }
 }
 
+TOKEN_AUTH_CACHE_TIMEOUT = int(os.environ.get('TOKEN_AUTH_CACHE_TIMEOUT', 300))
+
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 600))
+
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+# Requests served concurrently by one ASGI process, see core.asgi. Keep it
+# at or below what the database accepts per process.
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 32))
+
+INGREDIENT_MATRIX_USERS = int(os.environ.get('INGREDIENT_MATRIX_USERS', 1000))
+
+# 0 disables the per-user materialized recipe statistics
+RECIPE_STATS_CACHE_TIMEOUT = int(
+    os.environ.get('RECIPE_STATS_CACHE_TIMEOUT', 24 * 60 * 60)
+)
+
+# Maintain core.RecipeSummary and serve unfiltered recipe lists from it.
+# Run `manage.py recipe_summaries rebuild` before turning it on.
+RECIPE_SUMMARIES = os.environ.get('RECIPE_SUMMARIES') == '1'
+
+# Changes returned by one /api/recipe/sync/ call, rows written together are
+# never split over two calls
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', 500))
+
+# Requests a process serves at once before answering 503, 0 disables it,
+# see core.middleware.AdmissionControlMiddleware
+MAX_REQUESTS_IN_FLIGHT = int(os.environ.get('MAX_REQUESTS_IN_FLIGHT', 0))
+# ASGI requests allowed to wait for one of the ASGI_THREADS
+ASGI_MAX_QUEUE = int(os.environ.get('ASGI_MAX_QUEUE', 256))
+ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 1))
+
+# Response compression, see core.middleware.CompressionMiddleware
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.environ.get('COMPRESSION_BROTLI_QUALITY', 5)
+)
+
+# Request instrumentation, see core.middleware
+
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 500))
+DUPLICATE_QUERY_THRESHOLD = int(os.environ.get('DUPLICATE_QUERY_THRESHOLD', 5))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.slow_requests': {
+            'handlers': ['console'],
+            'level': os.environ.get('SLOW_REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# Password hashing, see core.hashers. New passwords use PASSWORD_HASHER, the
+# other algorithms only verify existing hashes, which are upgraded on login.
+# argon2 needs argon2-cffi and bcrypt needs bcrypt installed.
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+_PASSWORD_HASHERS = {
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in sorted(_PASSWORD_HASHERS.items())
+    if name != PASSWORD_HASHER
+]
+
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 120000)
+)
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+# KiB
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19456)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1)
+)
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+
+# Hashes run at once, one per core by default, and hashes allowed to wait
+# for a thread before logins and signups are answered with a 503
+PASSWORD_HASHING_THREADS = int(
+    os.environ.get('PASSWORD_HASHING_THREADS', os.cpu_count() or 1)
+)
+PASSWORD_HASHING_QUEUE = int(os.environ.get('PASSWORD_HASHING_QUEUE', 64))
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -124,4 +311,60 @@ MEDIA_URL = '/media/'
 STATIC_ROOT = os.path.join(BASE_DIR, '/static/')
 MEDIA_ROOT = os.path.join(BASE_DIR, '/media/')
 
+# How core.media serves MEDIA_URL: 'app' streams files from the worker,
+# 'x-accel' (nginx) and 'sendfile' (Apache, lighttpd) only check the request
+# and let the front server send the file. nginx needs an internal location
+# at MEDIA_ACCEL_REDIRECT_PREFIX aliased to MEDIA_ROOT.
+MEDIA_SERVING = os.environ.get('MEDIA_SERVING', 'app')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/',
+)
+# for files that may change, uuid named uploads are cached for a year
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 60 * 60))
+
+# Recipe images are post-processed off the request path, see recipe.images
+
+IMAGE_QUEUE_DIR = os.environ.get(
+    'IMAGE_QUEUE_DIR', os.path.join(BASE_DIR, 'var', 'image-queue'),
+)
+IMAGE_PROCESSING_WORKERS = int(os.environ.get('IMAGE_PROCESSING_WORKERS', 2))
+IMAGE_PROCESSING_EAGER = os.environ.get('IMAGE_PROCESSING_EAGER') == '1'
+IMAGE_THUMBNAIL_SIZE = (320, 320)
+IMAGE_WEBP_SIZE = (1280, 1280)
+
 AUTH_USER_MODEL = 'core.User'
+
+# orjson, msgpack and brotli are optional: core.renderers falls back to
+# DRF's encoder, application/msgpack is only offered when msgpack is
+# installed and core.middleware.CompressionMiddleware to gzip.
+_MSGPACK = find_spec('msgpack') is not None
+
+REST_FRAMEWORK = {
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ] + (['core.renderers.MessagePackRenderer'] if _MSGPACK else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ] + (['core.renderers.MessagePackParser'] if _MSGPACK else []),
+    'DEFAULT_THROTTLE_CLASSES': ['core.throttling.ScopedBucketThrottle'],
+    # burst/period token buckets per IP before login, per user after it;
+    # the *_ip rates are shared by all logged in users of one address
+    'DEFAULT_THROTTLE_RATES': {
+        'read': os.environ.get('THROTTLE_READ', '1200/min'),
+        'write': os.environ.get('THROTTLE_WRITE', '600/min'),
+        'upload': os.environ.get('THROTTLE_UPLOAD', '30/min'),
+        'login': os.environ.get('THROTTLE_LOGIN', '30/min'),
+        'read_ip': os.environ.get('THROTTLE_READ_IP', '12000/min'),
+        'write_ip': os.environ.get('THROTTLE_WRITE_IP', '6000/min'),
+        'upload_ip': os.environ.get('THROTTLE_UPLOAD_IP', '300/min'),
+    },
+    'NUM_PROXIES': int(os.environ['NUM_PROXIES'])
+    if 'NUM_PROXIES' in os.environ else None,
+}
+
+# Pagination classes are set per view set, PAGE_SIZE is only their default.
+SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
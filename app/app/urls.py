@@ -14,14 +14,20 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from core import media
+from core.views import RequestStatsView
 
 urlpatterns = [
                   path('admin/', admin.site.urls),
+                  path('api/stats/', RequestStatsView.as_view(),
+                       name='request-stats'),
                   path('api/user/', include('user.urls')),
                   path('api/recipe/', include('recipe.urls')),
                   path('api/recipe/', include('recipe.urls')),
-              ] + static(settings.MEDIA_URL,
-                         document_root=settings.MEDIA_ROOT)
+                  re_path(r'^{}(?P<path>.+)$'.format(
+                      settings.MEDIA_URL.lstrip('/')),
+                      media.serve, name='media'),
+              ]
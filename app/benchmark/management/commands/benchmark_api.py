@@ -0,0 +1,96 @@
+import json
+import platform
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmark import runner
+from benchmark.seed import benchmark_users, seed
+
+
+class Command(BaseCommand):
+    help = 'Seed the configured database and load test the API endpoints. ' \
+           'Never run this against a production database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true',
+                            help='Recreate the benchmark users and data')
+        parser.add_argument('--users', type=int, default=2)
+        parser.add_argument('--recipes', type=int, default=500,
+                            help='Recipes per user')
+        parser.add_argument('--tags', type=int, default=50,
+                            help='Tags per user')
+        parser.add_argument('--ingredients', type=int, default=200,
+                            help='Ingredients per user')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--endpoints', nargs='+',
+                            choices=sorted(runner.ENDPOINTS),
+                            default=sorted(runner.ENDPOINTS))
+        parser.add_argument('--bypass-cache', action='store_true',
+                            help='Make every request miss the response cache')
+        parser.add_argument('--output', help='Write the JSON report here')
+        parser.add_argument('--compare',
+                            help='Baseline JSON report to compare against')
+
+    @runner.unthrottled()
+    def handle(self, *args, **options):
+        if options['seed']:
+            started = time.perf_counter()
+            seed(options['users'], options['recipes'], options['tags'],
+                 options['ingredients'])
+            self.stderr.write(
+                f'Seeded in {time.perf_counter() - started:.1f}s'
+            )
+
+        users = list(benchmark_users())
+        if not users:
+            raise CommandError('No benchmark data, run with --seed first')
+
+        report = {
+            'meta': self._meta(options, users),
+            'endpoints': {
+                name: runner.run_endpoint(
+                    name,
+                    users,
+                    options['requests'],
+                    options['concurrency'],
+                    bypass_cache=options['bypass_cache'],
+                )
+                for name in options['endpoints']
+            },
+        }
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                report['changes'] = runner.compare(json.load(baseline), report)
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as stream:
+                stream.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def _meta(self, options, users):
+        try:
+            commit = subprocess.check_output(
+                ['git', 'rev-parse', 'HEAD'],
+                cwd=settings.BASE_DIR,
+                stderr=subprocess.DEVNULL,
+            ).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        return {
+            'commit': commit,
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'database': settings.DATABASES['default']['ENGINE'],
+            'users': len(users),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'bypass_cache': options['bypass_cache'],
+        }
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import random
+import time
+from contextlib import ExitStack
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from rest_framework.authtoken.models import Token
+
+from benchmark import runner
+from benchmark.seed import benchmark_users
+from core.asgi import ASGIHandler, wsgi_environ
+
+
+class SimulatedLatency:
+    """WSGI middleware adding a fixed delay to every SQL query.
+
+    Makes a local database behave like a networked one, so the benchmark
+    measures what a worker does while it waits on I/O.
+    """
+
+    def __init__(self, application, seconds):
+        self.application = application
+        self.seconds = seconds
+
+    def __call__(self, environ, start_response):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self._delay))
+            return self.application(environ, start_response)
+
+    def _delay(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Compare one synchronous WSGI worker with one ASGI process on ' \
+           'an I/O bound workload. Run benchmark_api --seed first.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help='Requests in flight on the ASGI process')
+        parser.add_argument('--db-latency-ms', type=float, default=2,
+                            help='Delay added to every query')
+        parser.add_argument('--endpoints', nargs='+',
+                            choices=sorted(runner.ENDPOINTS),
+                            default=['recipe-list', 'recipe-detail',
+                                     'tag-list', 'ingredient-list'])
+
+    @runner.unthrottled()
+    def handle(self, *args, **options):
+        users = list(benchmark_users())
+        if not users:
+            raise CommandError('No benchmark data, run benchmark_api --seed')
+
+        tokens = dict(
+            Token.objects.filter(user__in=users).values_list('user_id', 'key')
+        )
+        contexts = [runner.UserContext(user, tokens[user.id])
+                    for user in users]
+        wsgi = SimulatedLatency(
+            get_wsgi_application(), options['db_latency_ms'] / 1000,
+        )
+        asgi = ASGIHandler(wsgi, threads=options['concurrency'])
+        loop = asyncio.new_event_loop()
+
+        report = {
+            'meta': {
+                'users': len(users),
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'db_latency_ms': options['db_latency_ms'],
+            },
+            'endpoints': {},
+        }
+        try:
+            for name in options['endpoints']:
+                requests = self._requests(name, contexts, options['requests'])
+                baseline = self._run_wsgi(wsgi, requests)
+                concurrent = loop.run_until_complete(
+                    self._run_asgi(asgi, requests, options['concurrency'])
+                )
+                report['endpoints'][name] = {
+                    'wsgi': baseline,
+                    'asgi': concurrent,
+                    'throughput_change': runner._relative(
+                        baseline['throughput_rps'],
+                        concurrent['throughput_rps'],
+                    ),
+                }
+        finally:
+            loop.run_until_complete(
+                loop.run_in_executor(asgi.executor, connections.close_all)
+            )
+            asgi.executor.shutdown(wait=True)
+            loop.close()
+
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+
+    def _requests(self, name, contexts, count):
+        rng = random.Random(0)
+        build_url = runner.ENDPOINTS[name]
+        requests = []
+        for index in range(count):
+            context = contexts[index % len(contexts)]
+            url = build_url(context, rng)
+            # unique urls, so no request is served from the response cache
+            separator = '&' if '?' in url else '?'
+            requests.append((
+                f'{url}{separator}_={index}',
+                [('Authorization', f'Token {context.token}')],
+            ))
+
+        return requests
+
+    def _run_wsgi(self, application, requests):
+        """One synchronous worker: a request at a time, each blocking the
+        worker for its whole duration."""
+        latencies, statuses = [], []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(int(status.split(' ', 1)[0]))
+
+        started = time.perf_counter()
+        for url, headers in requests:
+            request_started = time.perf_counter()
+            path, _, query = url.partition('?')
+            environ = wsgi_environ({
+                'method': 'GET',
+                'path': path,
+                'query_string': query.encode('latin1'),
+                'headers': [(b'host', runner._host().encode('latin1'))] + [
+                    (name.encode('latin1'), value.encode('latin1'))
+                    for name, value in headers
+                ],
+            }, BytesIO())
+            response = application(environ, start_response)
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            latencies.append(time.perf_counter() - request_started)
+        elapsed = time.perf_counter() - started
+
+        return runner.summarize(latencies, [], statuses, elapsed)
+
+    async def _run_asgi(self, application, requests, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, statuses = [], []
+
+        async def one(url, headers):
+            async with semaphore:
+                started = time.perf_counter()
+                status, _ = await runner.asgi_get(application, url, headers)
+                latencies.append(time.perf_counter() - started)
+                statuses.append(status)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(url, headers) for url, headers in requests))
+        elapsed = time.perf_counter() - started
+
+        return runner.summarize(latencies, [], statuses, elapsed)
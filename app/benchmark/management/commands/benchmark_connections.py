@@ -0,0 +1,66 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from benchmark.runner import percentile
+
+
+def _timed(function, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'mean_ms': sum(timings) / len(timings),
+        'p50_ms': percentile(timings, 0.50),
+        'p95_ms': percentile(timings, 0.95),
+        'max_ms': max(timings),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Measure database connection setup cost against query cost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--iterations', type=int, default=100)
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        iterations = options['iterations']
+
+        def query():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+
+        def connect_directly():
+            raw = connection.Database.connect(
+                **connection.get_connection_params()
+            )
+            raw.cursor().execute('SELECT 1')
+            raw.close()
+
+        def reconnect():
+            # goes through the configured backend, i.e. the pool if any
+            connection.close()
+            query()
+
+        query()
+        report = {
+            'engine': connection.settings_dict['ENGINE'],
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+            'iterations': iterations,
+            'query_on_open_connection': _timed(query, iterations),
+            'new_connection': _timed(connect_directly, iterations),
+            'backend_reconnect': _timed(reconnect, iterations),
+        }
+        pool = getattr(connection, 'connection_pool', None)
+        if pool is not None:
+            report['pool'] = pool.stats()
+
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
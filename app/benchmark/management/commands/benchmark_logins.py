@@ -0,0 +1,76 @@
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from benchmark import runner
+from benchmark.seed import PASSWORD, benchmark_users
+
+
+class Command(BaseCommand):
+    help = 'Measure token logins per second with the configured password ' \
+           'hasher. Run benchmark_api --seed first.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=8)
+
+    @runner.unthrottled()
+    def handle(self, *args, **options):
+        emails = list(benchmark_users().values_list('email', flat=True))
+        if not emails:
+            raise CommandError('No benchmark data, run benchmark_api --seed')
+
+        requests, concurrency = options['requests'], options['concurrency']
+        url = reverse('user:token')
+        counter = itertools.count()
+        lock = threading.Lock()
+        latencies, statuses = [], []
+
+        def worker(worker_index):
+            client = APIClient(HTTP_HOST=runner._host())
+            try:
+                while True:
+                    index = next(counter)
+                    if index >= requests:
+                        break
+
+                    started = time.perf_counter()
+                    response = client.post(url, {
+                        'email': emails[index % len(emails)],
+                        'password': PASSWORD,
+                    })
+                    latency = time.perf_counter() - started
+                    with lock:
+                        latencies.append(latency)
+                        statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(worker, range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        result = runner.summarize(latencies, [], statuses, elapsed)
+        succeeded = statuses.count(200)
+        cores = len(os.sched_getaffinity(0)) \
+            if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+        result.update({
+            'hasher': settings.PASSWORD_HASHERS[0],
+            'hashing_threads': settings.PASSWORD_HASHING_THREADS,
+            'concurrency': concurrency,
+            'cores': cores,
+            'rejected': statuses.count(503),
+            'logins_per_second': succeeded / elapsed,
+            'logins_per_second_per_core': succeeded / elapsed / cores,
+        })
+        self.stdout.write(json.dumps(result, indent=2, sort_keys=True))
@@ -0,0 +1,89 @@
+import json
+import random
+import statistics
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+from core.middleware import COMPRESSORS
+
+
+def recipe_payload(count, random_seed=0):
+    """A recipe list shaped like RecipeSerializer output."""
+    rng = random.Random(random_seed)
+
+    return [
+        OrderedDict((
+            ('id', pk),
+            ('title', f'Recipe {pk} with a reasonably long title'),
+            ('ingredients', rng.sample(range(1, 2000), 8)),
+            ('tags', rng.sample(range(1, 200), 3)),
+            ('time_minutes', rng.randint(5, 240)),
+            ('link', f'https://example.com/recipes/{pk}'),
+            ('price', Decimal(rng.randint(100, 10000)) / 100),
+        ))
+        for pk in range(1, count + 1)
+    ]
+
+
+def _timed(function, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return result, statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = 'Measure render time and bytes on the wire of a recipe list ' \
+           'for every available renderer and compression'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--iterations', type=int, default=5)
+
+    def handle(self, *args, **options):
+        data = recipe_payload(options['recipes'])
+        candidates = {
+            'drf-json': JSONRenderer(),
+            'fast-json': renderers.FastJSONRenderer(),
+        }
+        if renderers.msgpack is not None:
+            candidates['msgpack'] = renderers.MessagePackRenderer()
+
+        report = {
+            'meta': {
+                'recipes': options['recipes'],
+                'iterations': options['iterations'],
+                'orjson': renderers.orjson is not None,
+            },
+            'renderers': {},
+        }
+        for name, renderer in candidates.items():
+            body, render_ms = _timed(
+                lambda: renderer.render(data, renderer.media_type, {}),
+                options['iterations'],
+            )
+            result = {'render_ms': render_ms, 'bytes': len(body)}
+            for encoding, compressor_class in sorted(COMPRESSORS.items()):
+                compressed, compress_ms = _timed(
+                    lambda: _compress(compressor_class(), body),
+                    options['iterations'],
+                )
+                result[encoding] = {
+                    'compress_ms': compress_ms,
+                    'bytes': len(compressed),
+                }
+            report['renderers'][name] = result
+
+        self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+
+
+def _compress(compressor, body):
+    return compressor.process(body) + compressor.finish()
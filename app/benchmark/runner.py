@@ -0,0 +1,207 @@
+import itertools
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+class UserContext:
+    def __init__(self, user, token):
+        self.user = user
+        self.token = token
+        self.recipe_ids = list(
+            Recipe.objects.filter(user=user).values_list('id', flat=True)
+        ) or [0]
+        self.tag_ids = list(
+            Tag.objects.filter(user=user).values_list('id', flat=True)
+        ) or [0]
+        self.ingredient_ids = list(
+            Ingredient.objects.filter(user=user).values_list('id', flat=True)
+        ) or [0]
+
+
+ENDPOINTS = {
+    'tag-list': lambda ctx, rng: reverse('recipe:tag-list'),
+    'ingredient-list': lambda ctx, rng: reverse('recipe:ingredient-list'),
+    'recipe-list': lambda ctx, rng: reverse('recipe:recipe-list'),
+    'recipe-list-by-tag': lambda ctx, rng: '{}?tags={}'.format(
+        reverse('recipe:recipe-list'), rng.choice(ctx.tag_ids),
+    ),
+    'recipe-detail': lambda ctx, rng: reverse(
+        'recipe:recipe-detail', args=[rng.choice(ctx.recipe_ids)],
+    ),
+    'recipe-cookable': lambda ctx, rng: '{}?ingredients={}'.format(
+        reverse('recipe:recipe-cookable'),
+        ','.join(str(pk) for pk in rng.sample(
+            ctx.ingredient_ids, min(10, len(ctx.ingredient_ids)),
+        )),
+    ),
+    'user-main': lambda ctx, rng: reverse('user:main'),
+}
+
+
+def unthrottled():
+    """Lifts the API rate limits, which a load test would otherwise hit
+    long before measuring anything."""
+    return override_settings(REST_FRAMEWORK=dict(
+        settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={},
+    ))
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+
+    return ordered[index]
+
+
+def summarize(latencies, queries, statuses, elapsed):
+    latencies_ms = [latency * 1000 for latency in latencies]
+
+    return {
+        'requests': len(latencies),
+        'errors': sum(1 for code in statuses if code >= 400),
+        'throughput_rps': len(latencies) / elapsed if elapsed else None,
+        'latency_ms': {
+            'mean': statistics.mean(latencies_ms) if latencies_ms else None,
+            'p50': percentile(latencies_ms, 0.50),
+            'p95': percentile(latencies_ms, 0.95),
+            'p99': percentile(latencies_ms, 0.99),
+            'max': max(latencies_ms) if latencies_ms else None,
+        },
+        'queries_per_request': statistics.mean(queries) if queries else None,
+    }
+
+
+def run_endpoint(name, users, requests, concurrency, bypass_cache=False,
+                 random_seed=0):
+    """Sends `requests` GETs to one endpoint from `concurrency` threads.
+
+    Each thread gets its own client, authenticated with the token of one of
+    the benchmark users, and its own database connection.
+    """
+    build_url = ENDPOINTS[name]
+    tokens = dict(
+        Token.objects.filter(user__in=users).values_list('user_id', 'key')
+    )
+    contexts = [UserContext(user, tokens[user.id]) for user in users]
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies, queries, statuses = [], [], []
+
+    def worker(worker_index):
+        rng = random.Random(random_seed + worker_index)
+        context = contexts[worker_index % len(contexts)]
+        client = APIClient(HTTP_HOST=_host())
+        client.credentials(HTTP_AUTHORIZATION=f'Token {context.token}')
+
+        try:
+            while next(counter) < requests:
+                url = build_url(context, rng)
+                if bypass_cache:
+                    separator = '&' if '?' in url else '?'
+                    url += f'{separator}_={rng.random()}'
+
+                with CaptureQueriesContext(connections['default']) as ctx:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    latency = time.perf_counter() - started
+
+                with lock:
+                    latencies.append(latency)
+                    queries.append(len(ctx.captured_queries))
+                    statuses.append(response.status_code)
+        finally:
+            if concurrency > 1:
+                connections.close_all()
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        # stay on the calling thread and its connection
+        worker(0)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, queries, statuses, elapsed)
+
+
+def _host():
+    allowed = [host for host in settings.ALLOWED_HOSTS
+               if not host.startswith(('.', '*'))]
+
+    return allowed[0] if allowed else 'localhost'
+
+
+def compare(baseline, current):
+    """Relative change of the headline metrics for every endpoint."""
+    changes = {}
+    for name, result in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before:
+            continue
+
+        changes[name] = {
+            metric: _relative(getter(before), getter(result))
+            for metric, getter in (
+                ('p95_ms', lambda r: r['latency_ms']['p95']),
+                ('throughput_rps', lambda r: r['throughput_rps']),
+                ('queries_per_request', lambda r: r['queries_per_request']),
+            )
+        }
+
+    return changes
+
+
+def _relative(before, after):
+    if before is None or after is None or before == 0:
+        return None
+
+    return (after - before) / before
+
+
+async def asgi_get(application, path, headers=()):
+    """Sends one GET through an ASGI application, returns (status, body)."""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': query.encode('latin1'),
+        'root_path': '',
+        'headers': [(b'host', _host().encode('latin1'))] + [
+            (name.lower().encode('latin1'), value.encode('latin1'))
+            for name, value in headers
+        ],
+        'client': ('127.0.0.1', 0),
+        'server': (_host(), 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+
+    return messages[0]['status'], b''.join(
+        message.get('body', b'') for message in messages[1:]
+    )
@@ -0,0 +1,93 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from core.bulk import bulk_create_with_pks
+from core.models import Tag, Ingredient, Recipe
+from core.signals import bulk_changed
+from recipe import sync
+
+EMAIL_TEMPLATE = 'bench-{}@benchmark.local'
+PASSWORD = 'benchmark-password'
+
+
+def benchmark_users():
+    return get_user_model().objects \
+        .filter(email__endswith='@benchmark.local') \
+        .order_by('id')
+
+
+def seed(users, recipes, tags, ingredients, tags_per_recipe=3,
+         ingredients_per_recipe=8, random_seed=0):
+    """Creates benchmark users with their tags, ingredients and recipes."""
+    rng = random.Random(random_seed)
+    benchmark_users().delete()
+
+    for index in range(users):
+        user = get_user_model().objects.create_user(
+            email=EMAIL_TEMPLATE.format(index),
+            password=PASSWORD,
+            name=f'Benchmark user {index}',
+        )
+        Token.objects.create(user=user)
+
+        # a transaction per user, like an import batch
+        with transaction.atomic():
+            sync.lock(user.id)
+            _seed_user(
+                rng, user, recipes, tags, ingredients, tags_per_recipe,
+                ingredients_per_recipe,
+            )
+
+
+def _seed_user(rng, user, recipes, tags, ingredients, tags_per_recipe,
+               ingredients_per_recipe):
+    tag_ids = _create_named(Tag, user, 'tag', tags)
+    ingredient_ids = _create_named(
+        Ingredient, user, 'ingredient', ingredients,
+    )
+    created = bulk_create_with_pks(Recipe, [
+        Recipe(
+            user=user,
+            title=f'Recipe {number}',
+            time_minutes=rng.randint(5, 240),
+            price=f'{rng.uniform(1, 100):.2f}',
+        )
+        for number in range(recipes)
+    ], batch_size=500)
+
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag_id)
+        for recipe in created
+        for tag_id in _sample(rng, tag_ids, tags_per_recipe)
+    ], batch_size=500)
+    Recipe.ingredients.through.objects.bulk_create([
+        Recipe.ingredients.through(
+            recipe_id=recipe.id, ingredient_id=ingredient_id,
+        )
+        for recipe in created
+        for ingredient_id in _sample(
+            rng, ingredient_ids, ingredients_per_recipe,
+        )
+    ], batch_size=500)
+
+    # search index, summaries, caches and sync sequences, as for an import
+    for model, ids in ((Tag, tag_ids), (Ingredient, ingredient_ids),
+                       (Recipe, [recipe.id for recipe in created])):
+        bulk_changed.send(sender=model, user_id=user.id, ids=ids)
+
+
+def _create_named(model, user, prefix, count):
+    objs = bulk_create_with_pks(
+        model,
+        [model(user=user, name=f'{prefix} {index}') for index in range(count)],
+        batch_size=500,
+    )
+
+    return [obj.id for obj in objs]
+
+
+def _sample(rng, ids, count):
+    return rng.sample(ids, min(count, len(ids)))
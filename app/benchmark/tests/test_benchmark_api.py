@@ -0,0 +1,99 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from benchmark import runner
+from benchmark.seed import benchmark_users
+from core.models import Recipe, RecipeSearchTerm, Tag
+
+
+class BenchmarkApiCommandTests(TestCase):
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('benchmark_api', *args, stdout=out, stderr=StringIO())
+
+        return json.loads(out.getvalue())
+
+    def test_seed_creates_requested_volumes(self):
+        self.run_command(
+            '--seed', '--users=2', '--recipes=5', '--tags=3',
+            '--ingredients=4', '--requests=1', '--concurrency=1',
+            '--endpoints', 'tag-list',
+        )
+
+        users = list(benchmark_users())
+        self.assertEqual(len(users), 2)
+        self.assertEqual(Recipe.objects.filter(user=users[0]).count(), 5)
+        self.assertEqual(Tag.objects.filter(user=users[1]).count(), 3)
+        self.assertEqual(
+            Recipe.tags.through.objects
+            .filter(recipe__user=users[0]).count(),
+            15,
+        )
+        # seeded like an import, visible to search and sync
+        self.assertTrue(
+            RecipeSearchTerm.objects.filter(user=users[0]).exists()
+        )
+        self.assertFalse(
+            Recipe.objects.filter(user=users[0], sequence=0).exists()
+        )
+        self.assertFalse(Tag.objects.filter(sequence=0).exists())
+
+    def test_report_per_endpoint(self):
+        report = self.run_command(
+            '--seed', '--users=1', '--recipes=3', '--tags=2',
+            '--ingredients=2', '--requests=4', '--concurrency=1',
+            '--bypass-cache',
+            '--endpoints', 'recipe-list', 'recipe-detail',
+        )
+
+        result = report['endpoints']['recipe-list']
+        self.assertEqual(set(report['endpoints']),
+                         {'recipe-list', 'recipe-detail'})
+        self.assertEqual(result['requests'], 4)
+        self.assertEqual(result['errors'], 0)
+        self.assertGreater(result['queries_per_request'], 0)
+        self.assertLessEqual(result['latency_ms']['p50'],
+                             result['latency_ms']['p99'])
+
+    def test_requires_seeded_data(self):
+        with self.assertRaises(CommandError):
+            self.run_command('--requests=1')
+
+
+class RunnerTests(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(runner.percentile(values, 0.5), 50)
+        self.assertEqual(runner.percentile(values, 0.99), 99)
+        self.assertIsNone(runner.percentile([], 0.5))
+
+    def test_compare(self):
+        def report(p95):
+            return {'endpoints': {'tag-list': {
+                'latency_ms': {'p95': p95},
+                'throughput_rps': 100,
+                'queries_per_request': 2,
+            }}}
+
+        changes = runner.compare(report(10), report(15))
+
+        self.assertEqual(changes['tag-list']['p95_ms'], 0.5)
+        self.assertEqual(changes['tag-list']['queries_per_request'], 0)
+
+
+class BenchmarkConnectionsCommandTests(TestCase):
+    def test_report(self):
+        out = StringIO()
+        call_command('benchmark_connections', '--iterations=3', stdout=out)
+
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(report['iterations'], 3)
+        for name in ('query_on_open_connection', 'new_connection',
+                     'backend_reconnect'):
+            self.assertGreater(report[name]['max_ms'], 0)
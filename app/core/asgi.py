@@ -0,0 +1,162 @@
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.middleware import overloaded_response
+
+
+class ASGIHandler:
+    """ASGI 3 application serving Django through its WSGI handler.
+
+    Django 2.1 has neither async views nor an async ORM, so every request
+    runs start to finish (view, response iteration and close) on a bounded
+    thread pool while the event loop keeps accepting connections and
+    reading bodies. Response chunks are handed back to the loop as they are
+    produced. Once ASGI_MAX_QUEUE requests wait for a thread, new ones are
+    answered with a 503 from the loop itself.
+    """
+
+    def __init__(self, wsgi_application=None, threads=None):
+        self.wsgi_application = wsgi_application or get_wsgi_application()
+        self.threads = threads or settings.ASGI_THREADS
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.threads, thread_name_prefix='asgi',
+        )
+        # only touched from the event loop
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        elif scope['type'] != 'http':
+            raise ValueError(f'Unsupported scope type {scope["type"]}')
+
+        if self.in_flight >= self.threads + settings.ASGI_MAX_QUEUE:
+            await self._send_overloaded(send)
+            return
+
+        self.in_flight += 1
+        try:
+            body = await self._read_body(receive)
+            loop = asyncio.get_event_loop()
+            try:
+                await loop.run_in_executor(
+                    self.executor, self._handle, scope, body, send, loop,
+                )
+            finally:
+                body.close()
+        finally:
+            self.in_flight -= 1
+
+    async def _send_overloaded(self, send):
+        response = overloaded_response()
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in response.items()
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': response.content})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, receive):
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+
+        return body
+
+    def _handle(self, scope, body, send, loop):
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ]
+
+        response = self.wsgi_application(
+            wsgi_environ(scope, body), start_response,
+        )
+        try:
+            send_sync({
+                'type': 'http.response.start',
+                'status': started['status'],
+                'headers': started['headers'],
+            })
+            for chunk in response:
+                if chunk:
+                    send_sync({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            send_sync({'type': 'http.response.body', 'body': b''})
+        finally:
+            # fires request_finished, which must run on the request's thread
+            close = getattr(response, 'close', None)
+            if close is not None:
+                close()
+
+
+def wsgi_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+
+    return environ
+
+
+def get_asgi_application():
+    return ASGIHandler()
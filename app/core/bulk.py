@@ -0,0 +1,116 @@
+from django.db import connections, router, transaction
+from django.db.models import CASCADE, AutoField, Case, Value, When
+from django.db.models.functions import Cast
+
+
+def bulk_create_with_pks(model, objs, batch_size=None):
+    """bulk_create() that sets primary keys on every backend.
+
+    PostgreSQL returns the ids from the INSERT itself. On SQLite every batch
+    is a single INSERT into an AUTOINCREMENT table, so its rows get
+    consecutive ids ending at last_insert_rowid(). Other backends insert
+    row by row.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+
+    alias = router.db_for_write(model)
+    connection = connections[alias]
+    manager = model._default_manager.using(alias)
+
+    if connection.features.can_return_ids_from_bulk_insert:
+        return manager.bulk_create(objs, batch_size=batch_size)
+
+    with transaction.atomic(using=alias):
+        if connection.vendor != 'sqlite':
+            for obj in objs:
+                obj.save(force_insert=True, using=alias)
+
+            return objs
+
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not isinstance(field, AutoField)
+        ]
+        size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+        if batch_size:
+            size = min(size, batch_size)
+
+        for start in range(0, len(objs), size):
+            batch = objs[start:start + size]
+            manager.bulk_create(batch, batch_size=len(batch))
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT last_insert_rowid()')
+                last, = cursor.fetchone()
+
+            for pk, obj in enumerate(batch, last - len(batch) + 1):
+                obj.pk = pk
+                obj._state.adding = False
+                obj._state.db = alias
+
+    return objs
+
+
+def bulk_update(model, objs, fields, batch_size=None):
+    """Writes the given fields of objs with one UPDATE per batch, each
+    column set through a CASE on the primary key.
+
+    Sends no model signals, callers send bulk_changed.
+    """
+    objs = list(objs)
+    if not objs:
+        return
+
+    alias = router.db_for_write(model)
+    connection = connections[alias]
+    fields = [model._meta.get_field(name) for name in fields]
+    size = max(
+        connection.ops.bulk_batch_size(['pk', 'pk'] + fields, objs), 1,
+    )
+    if batch_size:
+        size = min(size, batch_size)
+
+    with transaction.atomic(using=alias, savepoint=False):
+        for start in range(0, len(objs), size):
+            batch = objs[start:start + size]
+            values = {}
+            for field in fields:
+                value = Case(*[
+                    When(pk=obj.pk, then=Value(
+                        getattr(obj, field.attname), output_field=field,
+                    ))
+                    for obj in batch
+                ], output_field=field)
+                # PostgreSQL types the parameters of a CASE as text
+                if connection.vendor == 'postgresql':
+                    value = Cast(value, output_field=field)
+                values[field.attname] = value
+
+            model._base_manager.using(alias) \
+                .filter(pk__in=[obj.pk for obj in batch]) \
+                .update(**values)
+
+
+def delete_without_signals(queryset):
+    """queryset.delete() without loading the rows or sending the
+    per-instance delete signals, callers send bulk_changed(deleted=True).
+
+    The rows of auto-created many-to-many tables and of models with a
+    cascading foreign key to the deleted ones are deleted first, the same
+    way. Returns the number of rows of queryset deleted.
+    """
+    for relation in queryset.model._meta.get_fields(include_hidden=True):
+        if not relation.auto_created or relation.concrete or \
+                not (relation.one_to_many or relation.one_to_one):
+            continue
+        if relation.on_delete is not CASCADE:
+            raise ValueError(f'{relation} does not cascade.')
+
+        delete_without_signals(
+            relation.related_model._base_manager.filter(**{
+                f'{relation.field.name}__in': queryset.values('pk'),
+            })
+        )
+
+    return queryset._raw_delete(queryset.db)
@@ -0,0 +1,83 @@
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import ConnectionPool, PoolTimeout, ping
+
+Database = base.Database
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _ping(connection):
+    if connection.closed:
+        raise Database.InterfaceError('connection already closed')
+    ping(connection)
+    if not connection.autocommit:
+        connection.rollback()
+
+
+def _reset(connection):
+    if connection.closed:
+        raise Database.InterfaceError('connection already closed')
+    status = connection.get_transaction_status()
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend handing out connections from a process wide pool.
+
+    Closing the connection, e.g. at the end of a request when CONN_MAX_AGE
+    is 0, returns it to the pool instead of disconnecting. Pool options are
+    read from the POOL dict of the database settings.
+    """
+
+    connection_pool = None
+
+    def get_new_connection(self, conn_params):
+        self.connection_pool = self._pool(conn_params)
+        try:
+            connection = self.connection_pool.acquire()
+        except PoolTimeout as error:
+            raise Database.OperationalError(str(error))
+
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level,
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # the wrapper keeps a reference until the next connect()
+                self.connection_pool.discard(self.connection)
+            else:
+                self.connection_pool.release(self.connection)
+
+    def _pool(self, conn_params):
+        key = (self.alias, tuple(sorted(conn_params.items())))
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                options = self.settings_dict.get('POOL', {})
+                pool = _pools[key] = ConnectionPool(
+                    lambda: Database.connect(**conn_params),
+                    max_size=options.get('MAX_SIZE', 10),
+                    max_idle=options.get('MAX_IDLE', 300),
+                    check_interval=options.get('CHECK_INTERVAL', 30),
+                    timeout=options.get('TIMEOUT', 10),
+                    ping=_ping,
+                    reset=_reset,
+                )
+
+        return pool
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+def ping(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute('SELECT 1')
+    finally:
+        cursor.close()
+
+
+class ConnectionPool:
+    """Thread safe pool of DB-API connections.
+
+    Connections idle for longer than check_interval are pinged before being
+    handed out and the ones idle for longer than max_idle are closed, so
+    connections dropped by the server or a proxy are never returned.
+    """
+
+    def __init__(self, connect, max_size=10, max_idle=300,
+                 check_interval=30, timeout=10, ping=ping, reset=None):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.check_interval = check_interval
+        self.timeout = timeout
+        self.ping = ping
+        self.reset = reset
+        self.size = 0
+        self._idle = deque()
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._condition:
+                entry = self._take(deadline)
+
+            if entry is None:
+                try:
+                    return self.connect()
+                except Exception:
+                    self._forget()
+                    raise
+
+            connection, released_at = entry
+            idle = time.monotonic() - released_at
+            if idle <= self.max_idle and (
+                    idle < self.check_interval or self._alive(connection)):
+                return connection
+            self.discard(connection)
+
+    def release(self, connection):
+        try:
+            if self.reset is not None:
+                self.reset(connection)
+        except Exception:
+            self.discard(connection)
+            return
+
+        with self._condition:
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        self._forget()
+
+    def close_all(self):
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _ in idle:
+            self.discard(connection)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': self.size - len(self._idle),
+            }
+
+    def _take(self, deadline):
+        # Returns an idle (connection, released_at) pair, or None after
+        # reserving a slot for a new connection.
+        while True:
+            if self._idle:
+                # most recently used first, it is the least likely to be stale
+                return self._idle.pop()
+            if self.size < self.max_size:
+                self.size += 1
+                return None
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise PoolTimeout(
+                    f'No connection available within {self.timeout}s'
+                )
+            self._condition.wait(remaining)
+
+    def _alive(self, connection):
+        try:
+            self.ping(connection)
+        except Exception:
+            return False
+
+        return True
+
+    def _forget(self):
+        with self._condition:
+            self.size -= 1
+            self._condition.notify()
@@ -0,0 +1,85 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+_state = threading.local()
+
+
+def set_replica_reads(enabled):
+    """Picks the replica serving the current thread's reads, or sends them
+    back to the primary. One replica per request, so its queries never mix
+    rows from replicas lagging by different amounts."""
+    _state.replica = random.choice(settings.DATABASE_REPLICAS) \
+        if enabled and settings.DATABASE_REPLICAS else None
+
+
+def _pin_key(user_id):
+    return f'db:primary-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Sends the user's reads to the primary for READ_YOUR_WRITES_SECONDS,
+    long enough for the replicas to catch up with their last write."""
+    cache.set(
+        _pin_key(user_id),
+        time.time() + settings.READ_YOUR_WRITES_SECONDS,
+        settings.READ_YOUR_WRITES_SECONDS,
+    )
+
+
+def is_pinned(user_id):
+    return (cache.get(_pin_key(user_id)) or 0) > time.time()
+
+
+class ReplicaRouter:
+    """Reads go to the replica picked for the current thread while no
+    transaction is open, everything else goes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        replica = getattr(_state, 'replica', None)
+        # reads inside a transaction must see its uncommitted writes
+        if replica is not None and \
+                not connections['default'].in_atomic_block:
+            return replica
+
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema through replication
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadsMixin:
+    """Serves safe requests of authenticated users from the replicas.
+
+    Enabled after authentication, so users and tokens are always read from
+    the primary, and disabled for a while after any unsafe request of the
+    same user.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        set_replica_reads(
+            request.method in SAFE_METHODS and
+            not is_pinned(request.user.id)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        set_replica_reads(False)
+        user = getattr(request, 'user', None)
+        if request.method not in SAFE_METHODS and user is not None and \
+                user.is_authenticated:
+            pin_to_primary(user.id)
+
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many password checks in progress, retry shortly.'
+    default_code = 'hashing_busy'
+
+
+class HashingPool:
+    """Bounded pool running every password hash.
+
+    At most `threads` hashes run at once and at most `queue` more wait for a
+    thread; anything beyond that is rejected with HashingBusy instead of
+    piling up request threads behind a burst of logins.
+    """
+
+    def __init__(self, threads, queue):
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='hashing',
+        )
+        self.slots = threading.BoundedSemaphore(threads + queue)
+
+    def run(self, function, *args):
+        if getattr(_state, 'in_pool', False):
+            # e.g. PBKDF2 verify calls encode
+            return function(*args)
+
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            return self.executor.submit(_in_pool, function, *args).result()
+        finally:
+            self.slots.release()
+
+
+_state = threading.local()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _in_pool(function, *args):
+    _state.in_pool = True
+    try:
+        return function(*args)
+    finally:
+        _state.in_pool = False
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                settings.PASSWORD_HASHING_THREADS,
+                settings.PASSWORD_HASHING_QUEUE,
+            )
+
+        return _pool
+
+
+class PooledHasherMixin:
+    def encode(self, password, salt, *args):
+        return get_pool().run(super().encode, password, salt, *args)
+
+    def verify(self, password, encoded):
+        return get_pool().run(super().verify, password, encoded)
+
+
+# The algorithms keep Django's names, so existing hashes stay valid and are
+# upgraded on the next login when their parameters differ from the settings.
+
+class PBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class Argon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(PooledHasherMixin,
+                                 hashers.BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return settings.PASSWORD_BCRYPT_ROUNDS
@@ -0,0 +1,156 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+# names from core.models.recipe_image_file_path and their variants, which
+# are never rewritten
+IMMUTABLE_NAME = re.compile(
+    r'(^|/)[0-9a-f]{8}(-[0-9a-f]{4}){3}-[0-9a-f]{12}(-thumb)?\.[^/]+$'
+)
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRange:
+    """Reads `length` bytes of a file from `start`.
+
+    No fileno(), so a WSGI server streams it instead of sending the whole
+    file with sendfile.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _cache_control(path):
+    if IMMUTABLE_NAME.search(path):
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def _byte_range(request, etag, size):
+    """(start, end) of a satisfiable single range, None to send the whole
+    file. Multiple ranges are answered with the whole file as well."""
+    match = RANGE.match(request.META.get('HTTP_RANGE', '').strip())
+    if match is None:
+        return None
+
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is not None and if_range != etag:
+        return None
+
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        return None
+    elif first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        return None
+
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+
+    return start, end
+
+
+@require_safe
+def serve(request, path):
+    """Serves a file from MEDIA_ROOT.
+
+    With MEDIA_SERVING set to x-accel or sendfile the file is handed to the
+    front server, which reads it from disk itself; the app mode streams it
+    with conditional and range request support.
+    """
+    # safe_join raises SuspiciousFileOperation, a 400, for paths outside
+    full_path = safe_join(settings.MEDIA_ROOT, path)
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('File not found')
+    if not os.path.isfile(full_path):
+        raise Http404('File not found')
+
+    etag = _etag(stat)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime),
+    )
+    if response is None:
+        response = _file_response(request, path, full_path, etag, stat)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = _cache_control(path)
+
+    return response
+
+
+def _file_response(request, path, full_path, etag, stat):
+    content_type = mimetypes.guess_type(path)[0] \
+        or 'application/octet-stream'
+
+    if settings.MEDIA_SERVING == 'x-accel':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = \
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(path)
+        return response
+    elif settings.MEDIA_SERVING == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+        return response
+
+    try:
+        byte_range = _byte_range(request, etag, stat.st_size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(
+            open(full_path, 'rb'), content_type=content_type,
+        )
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(open(full_path, 'rb'), start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    response['Accept-Ranges'] = 'bytes'
+
+    return response
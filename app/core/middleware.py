@@ -0,0 +1,330 @@
+import json
+import logging
+import threading
+import time
+import zlib
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('core.slow_requests')
+
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.by_sql = defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            entry = self.by_sql[sql]
+            entry[0] += 1
+            entry[1] += duration
+
+    def duplicates(self, threshold):
+        return {
+            sql: count
+            for sql, (count, _) in self.by_sql.items()
+            if count >= threshold
+        }
+
+    def worst(self, limit=3):
+        ranked = sorted(
+            self.by_sql.items(), key=lambda item: item[1][1], reverse=True,
+        )
+
+        return [
+            {'sql': sql, 'count': count, 'ms': round(duration * 1000, 2)}
+            for sql, (count, duration) in ranked[:limit]
+        ]
+
+
+class ViewStats:
+    def __init__(self):
+        self.requests = 0
+        self.total_ms = 0.0
+        self.db_ms = 0.0
+        self.queries = 0
+        self.duplicated_requests = 0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def add(self, total_ms, db_ms, queries, has_duplicates):
+        self.requests += 1
+        self.total_ms += total_ms
+        self.db_ms += db_ms
+        self.queries += queries
+        self.duplicated_requests += has_duplicates
+        self.max_ms = max(self.max_ms, total_ms)
+
+        for index, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if total_ms <= bound:
+                self.buckets[index] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def as_dict(self):
+        bounds = [str(bound) for bound in HISTOGRAM_BUCKETS_MS] + ['+Inf']
+
+        return {
+            'requests': self.requests,
+            'mean_ms': self.total_ms / self.requests,
+            'mean_db_ms': self.db_ms / self.requests,
+            'mean_queries': self.queries / self.requests,
+            'max_ms': self.max_ms,
+            'requests_with_duplicates': self.duplicated_requests,
+            'histogram_ms': dict(zip(bounds, self.buckets)),
+        }
+
+
+class RequestStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(ViewStats)
+
+    def record(self, view, total_ms, db_ms, queries, has_duplicates):
+        with self._lock:
+            self._views[view].add(total_ms, db_ms, queries, has_duplicates)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: stats.as_dict()
+                for view, stats in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+request_stats = RequestStats()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name or match.func.__name__
+
+    action = getattr(match.func, 'actions', {}).get(request.method.lower())
+
+    return f'{view_class.__name__}.{action}' if action \
+        else view_class.__name__
+
+
+class QueryInstrumentationMiddleware:
+    """Counts and times SQL per request.
+
+    Adds a Server-Timing header, logs slow requests with their worst
+    queries and keeps per-view latency histograms in request_stats.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.duration * 1000
+
+        duplicates = recorder.duplicates(settings.DUPLICATE_QUERY_THRESHOLD)
+        view = view_name(request)
+        request_stats.record(
+            view, total_ms, db_ms, recorder.count, bool(duplicates),
+        )
+
+        response['Server-Timing'] = \
+            f'db;dur={db_ms:.2f};desc="{recorder.count} queries", ' \
+            f'app;dur={total_ms - db_ms:.2f}'
+
+        if total_ms >= settings.SLOW_REQUEST_MS:
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'view': view,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 2),
+                'db_ms': round(db_ms, 2),
+                'queries': recorder.count,
+                'duplicated_queries': duplicates,
+                'worst_queries': recorder.worst(),
+            }))
+
+        return response
+
+
+def overloaded_response():
+    response = JsonResponse(
+        {'detail': 'Server overloaded, retry shortly.'}, status=503,
+    )
+    response['Retry-After'] = str(settings.ADMISSION_RETRY_AFTER)
+
+    return response
+
+
+class AdmissionControlMiddleware:
+    """Answers 503 right away once MAX_REQUESTS_IN_FLIGHT requests are being
+    served by this process, instead of queueing more work behind them."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        limit = settings.MAX_REQUESTS_IN_FLIGHT
+        with self._lock:
+            if limit and self.in_flight >= limit:
+                return overloaded_response()
+            self.in_flight += 1
+
+        try:
+            return self.get_response(request)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/x-ndjson',
+                      'application/javascript', 'application/xml',
+                      'application/msgpack')
+
+
+class GzipCompressor:
+    def __init__(self):
+        # wbits 31: gzip header and trailer
+        self._compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31,
+        )
+
+    def process(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def _brotli_compressor():
+    return brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+
+COMPRESSORS = {'gzip': GzipCompressor}
+if brotli is not None:
+    COMPRESSORS['br'] = _brotli_compressor
+
+
+def accepted_encoding(header):
+    """br over gzip, when the client accepts it and it is available."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+
+    for encoding in ('br', 'gzip'):
+        if encoding in COMPRESSORS and encoding in accepted:
+            return encoding
+
+    return None
+
+
+def _compress_stream(encoding, chunks):
+    compressor = COMPRESSORS[encoding]()
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        # flushed per chunk, so export rows still arrive as they are made
+        data += compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compresses text-like responses with brotli or gzip.
+
+    Responses under COMPRESSION_MIN_SIZE bytes, partial content and
+    already encoded or incompressible (e.g. image) responses are sent as
+    they are.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') \
+                or response.status_code == 206 \
+                or not response.get('Content-Type', '').startswith(
+                    COMPRESSIBLE_TYPES):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = _compress_stream(
+                encoding, response.streaming_content,
+            )
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+
+            compressor = COMPRESSORS[encoding]()
+            compressed = compressor.process(response.content) \
+                + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # the representation differs from the uncompressed one
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = encoding
+
+        return response
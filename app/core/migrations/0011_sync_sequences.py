@@ -0,0 +1,106 @@
+# Generated by Django 2.1.5 on 2026-10-18 18:27
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max
+import django.db.models.deletion
+
+
+def backfill_sequences(apps, schema_editor):
+    # existing rows are numbered by id, each user's counter continues after
+    # the highest one
+    latest = {}
+    for name in ('Tag', 'Ingredient', 'Recipe'):
+        model = apps.get_model('core', name)
+        model.objects.update(sequence=F('id'))
+        rows = model.objects \
+            .values('user_id') \
+            .annotate(last=Max('id')) \
+            .values_list('user_id', 'last')
+        for user_id, last in rows:
+            latest[user_id] = max(latest.get(user_id, 0), last)
+
+    SyncState = apps.get_model('core', 'SyncState')
+    SyncState.objects.bulk_create([
+        SyncState(user_id=user_id, sequence=sequence)
+        for user_id, sequence in latest.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_stats_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('sequence', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('collection', models.CharField(max_length=16)),
+                ('object_id', models.IntegerField()),
+                ('sequence', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='sequence',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='sequence',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='sequence',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'sequence'], name='core_ingredient_user_sequence'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'sequence'], name='core_recipe_user_sequence'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'sequence'], name='core_tag_user_sequence'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user', 'sequence'], name='core_tombstone_user_sequence'),
+        ),
+        migrations.RunPython(backfill_sequences, migrations.RunPython.noop),
+    ]
@@ -51,6 +51,16 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    sequence = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'sequence'],
+                name='core_tag_user_sequence',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -62,12 +72,33 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    sequence = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'sequence'],
+                name='core_ingredient_user_sequence',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
 class Recipe(models.Model):
+    IMAGE_PENDING = 'pending'
+    IMAGE_PROCESSING = 'processing'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUSES = (
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_PROCESSING, 'Processing'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    )
+
     title = models.CharField(max_length=255)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -79,6 +110,128 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField(Ingredient)
     tags = models.ManyToManyField(Tag)
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_status = models.CharField(
+        max_length=16,
+        choices=IMAGE_STATUSES,
+        blank=True,
+    )
+    image_thumbnail = models.ImageField(null=True, editable=False)
+    image_webp = models.ImageField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    sequence = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'sequence'],
+                name='core_recipe_user_sequence',
+            ),
+            models.Index(
+                fields=['user', 'price'],
+                name='core_recipe_user_price',
+            ),
+            models.Index(
+                fields=['user', 'time_minutes'],
+                name='core_recipe_user_time',
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeSearchTerm(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+    )
+    term = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'term'],
+                name='core_search_user_term',
+            ),
+        ]
+
+
+class RecipeSummary(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='summary',
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    title = models.CharField(max_length=255)
+    time_minutes = models.IntegerField()
+    price = models.DecimalField(max_digits=5, decimal_places=2)
+    link = models.CharField(max_length=255, blank=True)
+    # JSON arrays of {"id": ..., "name": ...} objects
+    tags = models.TextField(default='[]')
+    ingredients = models.TextField(default='[]')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'recipe'],
+                name='core_summary_user_recipe',
+            ),
+        ]
+
+
+class SyncState(models.Model):
+    """Last change sequence handed out to a user's tags, ingredients and
+    recipes."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    sequence = models.BigIntegerField(default=0)
+
+
+class Tombstone(models.Model):
+    """A deleted tag, ingredient or recipe, for clients syncing changes."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    # 'tags', 'ingredients' or 'recipes'
+    collection = models.CharField(max_length=16)
+    object_id = models.IntegerField()
+    sequence = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'sequence'],
+                name='core_tombstone_user_sequence',
+            ),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """Rows of a recipe import committed so far, written in the transaction
+    of each batch."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    name = models.CharField(max_length=255)
+    offset = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'name')
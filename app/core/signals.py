@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent with sender=<model class> after writes that bypass the per-instance
+# model signals (bulk_create, queryset updates, through-table inserts), and
+# with deleted=True after queryset deletes.
+bulk_changed = Signal(providing_args=['user_id', 'ids', 'deleted'])
@@ -0,0 +1,164 @@
+import asyncio
+import json
+from io import StringIO
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+
+from benchmark.seed import seed
+from core.asgi import ASGIHandler, wsgi_environ
+from core.models import Tag
+
+TOKEN_URL = reverse("user:token")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+class ASGIClient:
+    def __init__(self, application):
+        self.application = application
+        self.loop = asyncio.new_event_loop()
+
+    def close(self):
+        self.loop.run_until_complete(self.loop.run_in_executor(
+            self.application.executor, connections.close_all,
+        ))
+        self.application.executor.shutdown(wait=True)
+        self.loop.close()
+
+    def request(self, method, path, body=b'', headers=(), chunk_size=None):
+        chunk_size = chunk_size or max(len(body), 1)
+        chunks = [body[start:start + chunk_size]
+                  for start in range(0, len(body), chunk_size)] or [b'']
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')] + [
+                (name.encode(), value.encode()) for name, value in headers
+            ],
+        }
+        messages = []
+
+        async def receive():
+            chunk = chunks.pop(0)
+            return {'type': 'http.request', 'body': chunk,
+                    'more_body': bool(chunks)}
+
+        async def send(message):
+            messages.append(message)
+
+        self.loop.run_until_complete(self.application(scope, receive, send))
+
+        return messages
+
+
+class ASGIHandlerTests(TransactionTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@londonappdev.com", "testpass",
+        )
+        self.client = ASGIClient(ASGIHandler(threads=2))
+        self.addCleanup(self.client.close)
+
+    def test_unknown_path(self):
+        messages = self.client.request('GET', '/missing/')
+
+        self.assertEqual(messages[0]['type'], 'http.response.start')
+        self.assertEqual(messages[0]['status'], 404)
+        self.assertEqual(messages[-1], {'type': 'http.response.body',
+                                        'body': b''})
+
+    def test_token_and_authenticated_read(self):
+        Tag.objects.create(user=self.user, name='Vegan')
+        body = urlencode({
+            'email': 'test@londonappdev.com', 'password': 'testpass',
+        }).encode()
+
+        messages = self.client.request(
+            'POST', TOKEN_URL, body, chunk_size=10, headers=[
+                ('content-type', 'application/x-www-form-urlencoded'),
+                ('content-length', str(len(body))),
+            ],
+        )
+        self.assertEqual(messages[0]['status'], 200)
+        token = json.loads(messages[1]['body'])['token']
+
+        messages = self.client.request('GET', TAGS_URL, headers=[
+            ('authorization', f'Token {token}'),
+        ])
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertIn((b'content-type', b'application/json'),
+                      messages[0]['headers'])
+        payload = json.loads(b''.join(m.get('body', b'')
+                                      for m in messages[1:]))
+        names = [tag['name'] for tag in payload.get('results', payload)]
+        self.assertEqual(names, ['Vegan'])
+
+    def test_overloaded(self):
+        self.client.application.in_flight = 2
+
+        with self.settings(ASGI_MAX_QUEUE=0):
+            messages = self.client.request('GET', TAGS_URL)
+
+        self.assertEqual(messages[0]['status'], 503)
+        self.assertIn((b'retry-after', b'1'), messages[0]['headers'])
+
+    def test_lifespan(self):
+        events = [{'type': 'lifespan.startup'},
+                  {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return events.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        application = ASGIHandler(threads=1)
+        self.client.loop.run_until_complete(
+            application({'type': 'lifespan'}, receive, send)
+        )
+
+        self.assertEqual([message['type'] for message in sent], [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete',
+        ])
+
+
+class WSGIEnvironTests(SimpleTestCase):
+    def test_headers(self):
+        environ = wsgi_environ({
+            'method': 'GET',
+            'path': '/api/café/',
+            'query_string': b'a=1',
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'x-forwarded-for', b'10.0.0.1'),
+                (b'x-forwarded-for', b'10.0.0.2'),
+            ],
+        }, None)
+
+        self.assertEqual(environ['PATH_INFO'], '/api/cafÃ©/')
+        self.assertEqual(environ['QUERY_STRING'], 'a=1')
+        self.assertEqual(environ['CONTENT_TYPE'], 'application/json')
+        self.assertEqual(environ['HTTP_X_FORWARDED_FOR'],
+                         '10.0.0.1,10.0.0.2')
+
+
+class BenchmarkAsgiCommandTests(TransactionTestCase):
+    def test_report(self):
+        seed(1, 3, 2, 2)
+        out = StringIO()
+
+        call_command('benchmark_asgi', '--requests=4', '--concurrency=2',
+                     '--db-latency-ms=0', '--endpoints', 'tag-list',
+                     stdout=out)
+
+        result = json.loads(out.getvalue())['endpoints']['tag-list']
+        for mode in ('wsgi', 'asgi'):
+            self.assertEqual(result[mode]['requests'], 4)
+            self.assertEqual(result[mode]['errors'], 0)
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.bulk import bulk_create_with_pks
+from core.models import Tag
+
+
+class BulkCreateWithPksTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="bulk@test.pl",
+            password="passwordpassword",
+        )
+
+    def test_pks_match_the_inserted_rows(self):
+        Tag.objects.create(user=self.user, name='existing')
+
+        tags = bulk_create_with_pks(Tag, [
+            Tag(user=self.user, name=f'tag {index}') for index in range(7)
+        ], batch_size=3)
+
+        self.assertEqual(
+            [(tag.pk, tag.name) for tag in tags],
+            [(pk, name) for pk, name in Tag.objects.filter(
+                pk__in=[tag.pk for tag in tags],
+            ).order_by('pk').values_list('pk', 'name')],
+        )
+        self.assertEqual(len({tag.pk for tag in tags}), 7)
+        self.assertFalse(any(tag._state.adding for tag in tags))
+
+    def test_empty(self):
+        self.assertEqual(bulk_create_with_pks(Tag, []), [])
@@ -0,0 +1,78 @@
+import sqlite3
+import time
+
+from django.db import connection
+from django.test import TestCase
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+class ConnectionPoolTests(TestCase):
+    def test_released_connection_is_reused(self):
+        pool = ConnectionPool(connect, max_size=2)
+        first = pool.acquire()
+        pool.release(first)
+
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(pool.stats(), {'size': 1, 'idle': 0, 'in_use': 1})
+
+    def test_acquire_times_out_when_exhausted(self):
+        pool = ConnectionPool(connect, max_size=1, timeout=0.01)
+        pool.acquire()
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+    def test_dead_connection_is_replaced(self):
+        pool = ConnectionPool(connect, max_size=1, check_interval=0)
+        dead = pool.acquire()
+        pool.release(dead)
+        dead.close()
+
+        fresh = pool.acquire()
+
+        self.assertIsNot(fresh, dead)
+        self.assertEqual(pool.size, 1)
+
+    def test_long_idle_connection_is_closed(self):
+        pool = ConnectionPool(connect, max_size=1, max_idle=0)
+        idle = pool.acquire()
+        pool.release(idle)
+        time.sleep(0.01)
+
+        self.assertIsNot(pool.acquire(), idle)
+
+    def test_failed_reset_discards_connection(self):
+        def reset(connection):
+            raise sqlite3.OperationalError('broken')
+
+        pool = ConnectionPool(connect, max_size=1, reset=reset)
+        pool.release(pool.acquire())
+
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_failed_connect_frees_slot(self):
+        def connect_failing():
+            raise sqlite3.OperationalError('refused')
+
+        pool = ConnectionPool(connect_failing, max_size=1)
+        with self.assertRaises(sqlite3.OperationalError):
+            pool.acquire()
+
+        self.assertEqual(pool.size, 0)
+
+
+class SqlitePragmaTests(TestCase):
+    def test_pragmas_are_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+            cursor.execute('PRAGMA temp_store')
+            temp_store = cursor.fetchone()[0]
+
+        self.assertEqual(synchronous, 1)  # NORMAL
+        self.assertEqual(temp_store, 2)  # MEMORY
@@ -0,0 +1,127 @@
+import json
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from benchmark.seed import seed
+from core import hashers
+
+TOKEN_URL = reverse("user:token")
+CREATE_USER_URL = reverse("user:create")
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+LEGACY_HASHERS = [
+    'core.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.SHA1PasswordHasher',
+]
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class HasherTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def login(self):
+        return self.client.post(TOKEN_URL, {
+            'email': 'test@londonappdev.com', 'password': 'testpass',
+        })
+
+    def create_user(self):
+        return get_user_model().objects.create_user(
+            'test@londonappdev.com', 'testpass',
+        )
+
+    def test_new_passwords_use_configured_hasher(self):
+        user = self.create_user()
+
+        hasher = identify_hasher(user.password)
+        self.assertIsInstance(hasher, hashers.PBKDF2PasswordHasher)
+        self.assertEqual(user.password.split('$')[1], '1000')
+
+    def test_login_upgrades_parameters(self):
+        user = self.create_user()
+
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            res = self.login()
+
+        user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(user.password.split('$')[1], '2000')
+
+    def test_login_upgrades_algorithm(self):
+        with self.settings(PASSWORD_HASHERS=LEGACY_HASHERS[::-1]):
+            user = self.create_user()
+        self.assertTrue(user.password.startswith('sha1$'))
+
+        with self.settings(PASSWORD_HASHERS=LEGACY_HASHERS):
+            res = self.login()
+
+        user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_busy_pool_rejects_login(self):
+        self.create_user()
+        pool = hashers.HashingPool(threads=1, queue=0)
+        pool.slots.acquire()
+
+        with mock.patch.object(hashers, 'get_pool', return_value=pool):
+            res = self.login()
+            created = self.client.post(CREATE_USER_URL, {
+                'email': 'other@londonappdev.com', 'password': 'testpass',
+                'name': 'Other',
+            })
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(created.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(get_user_model().objects.filter(
+            email='other@londonappdev.com').exists())
+
+    @skipUnless(argon2, 'argon2-cffi is not installed')
+    @override_settings(
+        PASSWORD_HASHERS=['core.hashers.Argon2PasswordHasher'],
+        PASSWORD_ARGON2_MEMORY_COST=1024,
+    )
+    def test_argon2_parameters(self):
+        user = self.create_user()
+
+        summary = identify_hasher(user.password) \
+            .safe_summary(user.password)
+        self.assertEqual(summary['memory cost'], 1024)
+
+
+class HashingPoolTests(TestCase):
+    def test_runs_nested_calls_inline(self):
+        pool = hashers.HashingPool(threads=1, queue=0)
+
+        result = pool.run(lambda: pool.run(lambda: 'hashed'))
+
+        self.assertEqual(result, 'hashed')
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class BenchmarkLoginsCommandTests(TransactionTestCase):
+    def test_report(self):
+        seed(2, 1, 1, 1)
+        out = StringIO()
+
+        call_command('benchmark_logins', '--requests=4', '--concurrency=2',
+                     stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['requests'], 4)
+        self.assertEqual(report['errors'], 0)
+        self.assertGreater(report['logins_per_second_per_core'], 0)
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+IMAGE_NAME = 'uploads/recipe/0b9a8a3e-5d1f-4c3a-9e2b-3f7d2c1a0e4f.jpg'
+IMAGE_URL = f'/media/{IMAGE_NAME}'
+CONTENT = b'0123456789'
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        for name in (IMAGE_NAME, 'notes.txt'):
+            path = os.path.join(self.media_root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as stream:
+                stream.write(CONTENT)
+
+    def get(self, url, **headers):
+        res = self.client.get(url, **headers)
+        self.addCleanup(res.close)
+
+        return res
+
+    def body(self, res):
+        return b''.join(res.streaming_content)
+
+    def test_serves_file(self):
+        res = self.get(IMAGE_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.body(res), CONTENT)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Content-Length'], '10')
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertTrue(res['ETag'].startswith('"a-'))
+        self.assertIn('Last-Modified', res)
+
+    def test_uuid_named_files_are_immutable(self):
+        image = self.get(IMAGE_URL)
+        notes = self.get('/media/notes.txt')
+
+        self.assertEqual(image['Cache-Control'],
+                         'public, max-age=31536000, immutable')
+        self.assertEqual(notes['Cache-Control'], 'public, max-age=3600')
+
+    def test_not_modified(self):
+        etag = self.get(IMAGE_URL)['ETag']
+
+        res = self.get(IMAGE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_range(self):
+        res = self.get(IMAGE_URL, HTTP_RANGE='bytes=2-5')
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(self.body(res), b'2345')
+        self.assertEqual(res['Content-Length'], '4')
+        self.assertEqual(res['Content-Range'], 'bytes 2-5/10')
+
+    def test_suffix_and_open_ranges(self):
+        suffix = self.get(IMAGE_URL, HTTP_RANGE='bytes=-3')
+        open_ended = self.get(IMAGE_URL, HTTP_RANGE='bytes=8-')
+
+        self.assertEqual(self.body(suffix), b'789')
+        self.assertEqual(self.body(open_ended), b'89')
+
+    def test_unsatisfiable_range(self):
+        res = self.get(IMAGE_URL, HTTP_RANGE='bytes=10-')
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], 'bytes */10')
+
+    def test_stale_if_range_sends_whole_file(self):
+        res = self.get(IMAGE_URL, HTTP_RANGE='bytes=2-5',
+                       HTTP_IF_RANGE='"stale"')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.body(res), CONTENT)
+
+    def test_missing_files(self):
+        for url in ('/media/uploads/missing.jpg', '/media/uploads/'):
+            self.assertEqual(self.get(url).status_code, 404, url)
+
+    def test_path_outside_media_root(self):
+        res = self.get('/media/../etc/passwd')
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_only_safe_methods(self):
+        self.assertEqual(self.client.post(IMAGE_URL).status_code, 405)
+
+    @override_settings(MEDIA_SERVING='x-accel')
+    def test_x_accel_redirect(self):
+        res = self.get(IMAGE_URL)
+
+        self.assertEqual(res['X-Accel-Redirect'],
+                         f'/protected-media/{IMAGE_NAME}')
+        self.assertEqual(res.content, b'')
+        self.assertIn('immutable', res['Cache-Control'])
+
+    @override_settings(MEDIA_SERVING='sendfile')
+    def test_x_sendfile(self):
+        res = self.get(IMAGE_URL)
+
+        self.assertEqual(res['X-Sendfile'],
+                         os.path.join(self.media_root, IMAGE_NAME))
+        self.assertEqual(res.content, b'')
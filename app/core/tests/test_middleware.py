@@ -0,0 +1,118 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.middleware import QueryInstrumentationMiddleware, request_stats
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+STATS_URL = reverse("request-stats")
+
+
+class QueryInstrumentationMiddlewareTests(TestCase):
+    def setUp(self):
+        request_stats.reset()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="stats@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        res = self.client.get(TAGS_URL)
+
+        self.assertRegex(
+            res['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+$',
+        )
+
+    @override_settings(SLOW_REQUEST_MS=0, DUPLICATE_QUERY_THRESHOLD=3)
+    def test_slow_request_logs_duplicated_queries(self):
+        def get_response(request):
+            for tag in Tag.objects.filter(user=self.user):
+                Recipe.objects.filter(tags=tag).count()
+            return HttpResponse()
+
+        for index in range(3):
+            Tag.objects.create(user=self.user, name=f'tag {index}')
+        middleware = QueryInstrumentationMiddleware(get_response)
+
+        with self.assertLogs('core.slow_requests', 'WARNING') as logs:
+            middleware(RequestFactory().get('/n-plus-one/'))
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['view'], 'unresolved')
+        self.assertEqual(list(entry['duplicated_queries'].values()), [3])
+        self.assertTrue(entry['worst_queries'])
+
+    @override_settings(SLOW_REQUEST_MS=0, DUPLICATE_QUERY_THRESHOLD=3)
+    def test_recipe_tags_are_not_looked_up_one_by_one(self):
+        payload = {
+            'title': 'no n plus one',
+            'time_minutes': 5,
+            'price': '1.00',
+            'tags': [
+                Tag.objects.create(user=self.user, name=f'tag {index}').id
+                for index in range(3)
+            ],
+        }
+
+        with self.assertLogs('core.slow_requests', 'WARNING') as logs:
+            self.client.post(RECIPES_URL, payload)
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['view'], 'RecipeViewSet.create')
+        self.assertEqual(entry['status'], status.HTTP_201_CREATED)
+        self.assertEqual(entry['duplicated_queries'], {})
+
+    def test_per_view_stats(self):
+        Recipe.objects.create(
+            user=self.user, title='a', time_minutes=1, price=1,
+        )
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+        self.client.get(TAGS_URL)
+
+        stats = request_stats.snapshot()
+
+        self.assertEqual(stats['RecipeViewSet.list']['requests'], 2)
+        self.assertEqual(stats['TagViewSet.list']['requests'], 1)
+        self.assertEqual(
+            sum(stats['RecipeViewSet.list']['histogram_ms'].values()), 2,
+        )
+
+
+class RequestStatsViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_stats_require_staff(self):
+        user = get_user_model().objects.create_user(
+            email="user@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stats_for_staff(self):
+        admin = get_user_model().objects.create_superuser(
+            email="admin@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(admin)
+        self.client.get(STATS_URL)
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('RequestStatsView', res.data)
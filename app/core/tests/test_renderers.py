@@ -0,0 +1,164 @@
+import gzip
+import io
+import json
+from collections import OrderedDict
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, \
+    override_settings
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core import middleware, renderers
+from core.middleware import CompressionMiddleware, accepted_encoding
+from core.models import Tag
+
+TAGS_URL = reverse("recipe:tag-list")
+
+DATA = OrderedDict((
+    ('price', Decimal('12.50')),
+    ('name', gettext_lazy('Vegan')),
+    ('items', [1, 2, 3]),
+))
+
+
+class FastJSONTests(SimpleTestCase):
+    def test_matches_drf_rendering(self):
+        expected = json.loads(JSONRenderer().render(DATA))
+
+        for orjson in (renderers.orjson, None):
+            with mock.patch.object(renderers, 'orjson', orjson):
+                rendered = renderers.FastJSONRenderer().render(DATA)
+
+            self.assertEqual(json.loads(rendered), expected)
+
+    def test_indent_uses_drf_encoder(self):
+        rendered = renderers.FastJSONRenderer().render(
+            {'a': 1}, 'application/json; indent=4',
+        )
+
+        self.assertEqual(rendered, b'{\n    "a": 1\n}')
+
+    def test_parse(self):
+        parser = renderers.FastJSONParser()
+
+        for orjson in (renderers.orjson, None):
+            with mock.patch.object(renderers, 'orjson', orjson):
+                self.assertEqual(parser.parse(io.BytesIO(b'{"a": [1]}')),
+                                 {'a': [1]})
+                with self.assertRaises(ParseError):
+                    parser.parse(io.BytesIO(b'{"a": '))
+
+
+@skipUnless(renderers.msgpack, 'msgpack is not installed')
+class MessagePackTests(TestCase):
+    def test_round_trip(self):
+        rendered = renderers.MessagePackRenderer().render(DATA)
+
+        parsed = renderers.MessagePackParser().parse(io.BytesIO(rendered))
+
+        self.assertEqual(parsed, {'price': 12.5, 'name': 'Vegan',
+                                  'items': [1, 2, 3]})
+
+    def test_negotiated_by_accept(self):
+        user = get_user_model().objects.create_user(
+            "test@londonappdev.com", "testpass",
+        )
+        Tag.objects.create(user=user, name='Vegan')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.get(TAGS_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        parsed = renderers.msgpack.unpackb(res.content, raw=False)
+        self.assertEqual(parsed['results'][0]['name'], 'Vegan')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=100)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def respond(self, response, accept_encoding='gzip, deflate'):
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept_encoding,
+        )
+
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip(self):
+        body = b'{"title": "Recipe"}' * 20
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = '"abc"'
+
+        res = self.respond(response)
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), body)
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(res['ETag'], 'W/"abc"')
+
+    def test_small_and_incompressible_responses(self):
+        for response in (
+                HttpResponse(b'{}', content_type='application/json'),
+                HttpResponse(b'x' * 200, content_type='image/jpeg'),
+                HttpResponse(b'x' * 200, content_type='text/plain',
+                             status=206),
+        ):
+            self.assertFalse(self.respond(response)
+                             .has_header('Content-Encoding'))
+
+    def test_not_accepted(self):
+        response = HttpResponse(b'x' * 200, content_type='text/plain')
+
+        res = self.respond(response, accept_encoding='gzip;q=0, identity')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+
+    def test_streaming(self):
+        rows = [b'{"id": %d}\n' % pk for pk in range(50)]
+        response = StreamingHttpResponse(
+            iter(rows), content_type='application/x-ndjson',
+        )
+
+        res = self.respond(response)
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(res.streaming_content)),
+                         b''.join(rows))
+
+    @skipUnless(middleware.brotli, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        body = b'text ' * 100
+        response = HttpResponse(body, content_type='text/plain')
+
+        res = self.respond(response, accept_encoding='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(middleware.brotli.decompress(res.content), body)
+
+    def test_accepted_encoding(self):
+        self.assertEqual(accepted_encoding('deflate, GZIP;q=0.5'), 'gzip')
+        self.assertIsNone(accepted_encoding(''))
+        self.assertIsNone(accepted_encoding('identity'))
+
+
+class BenchmarkRenderersCommandTests(SimpleTestCase):
+    def test_report(self):
+        out = io.StringIO()
+
+        call_command('benchmark_renderers', '--recipes=20',
+                     '--iterations=1', stdout=out)
+
+        report = json.loads(out.getvalue())['renderers']
+        self.assertEqual(report['drf-json']['bytes'],
+                         report['fast-json']['bytes'])
+        self.assertLess(report['drf-json']['gzip']['bytes'],
+                        report['drf-json']['bytes'])
@@ -0,0 +1,126 @@
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, \
+    override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.db import router
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = router.ReplicaRouter()
+        self.addCleanup(router.set_replica_reads, False)
+
+    def test_reads_go_to_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_reads_go_to_replica_when_enabled(self):
+        router.set_replica_reads(True)
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'replica_1')
+        self.assertEqual(self.router.db_for_write(Recipe), 'default')
+
+    @override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+    def test_one_replica_serves_all_reads(self):
+        router.set_replica_reads(True)
+        replica = self.router.db_for_read(Recipe)
+
+        self.assertEqual(
+            {self.router.db_for_read(Tag) for _ in range(20)}, {replica},
+        )
+
+        router.set_replica_reads(False)
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_reads_in_transaction_go_to_primary(self):
+        router.set_replica_reads(True)
+
+        with mock.patch.object(connections['default'], 'in_atomic_block',
+                               True):
+            self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        router.set_replica_reads(True)
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica_1', 'core'))
+        self.assertTrue(self.router.allow_migrate('default', 'core'))
+
+    @override_settings(READ_YOUR_WRITES_SECONDS=5)
+    def test_pin_expires(self):
+        router.pin_to_primary(1)
+
+        self.assertTrue(router.is_pinned(1))
+        self.assertFalse(router.is_pinned(2))
+        with mock.patch('core.db.router.time.time', return_value=2 ** 40):
+            self.assertFalse(router.is_pinned(1))
+
+
+class ReplicaReadsMixinTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="router@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def route_of(self, method, url, data=None):
+        with mock.patch('core.db.router.set_replica_reads',
+                        wraps=router.set_replica_reads) as spy:
+            getattr(self.client, method)(url, data)
+
+        return [call[0][0] for call in spy.call_args_list]
+
+    def test_safe_request_reads_from_replicas(self):
+        self.assertEqual(self.route_of('get', TAGS_URL), [True, False])
+
+    def test_write_pins_user_to_primary(self):
+        self.assertEqual(
+            self.route_of('post', TAGS_URL, {'name': 'vegan'}),
+            [False, False],
+        )
+
+        self.assertTrue(router.is_pinned(self.user.id))
+        self.assertEqual(self.route_of('get', TAGS_URL), [False, False])
+
+
+@skipUnless(settings.DATABASE_REPLICAS,
+            'set DB_REPLICAS, e.g. DB_REPLICAS=/tmp/replica.sqlite3')
+class ReplicaRoutingEndToEndTests(TransactionTestCase):
+    multi_db = True
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="replica@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+        Tag.objects.create(user=self.user, name='vegan')
+
+    def test_list_is_read_from_replica(self):
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with CaptureQueriesContext(replica) as queries:
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.data['results'][0]['name'], 'vegan')
+        self.assertTrue(queries.captured_queries)
@@ -0,0 +1,173 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, \
+    override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import throttling
+from core.middleware import AdmissionControlMiddleware
+from core.models import Recipe
+
+TAGS_URL = reverse("recipe:tag-list")
+TOKEN_URL = reverse("user:token")
+
+
+def rates(**scopes):
+    return override_settings(REST_FRAMEWORK=dict(
+        settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES=scopes,
+    ))
+
+
+class BucketStoreTests(SimpleTestCase):
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate('120/min'), (120, 2))
+        self.assertIsNone(throttling.parse_rate(None))
+
+    def test_local_bucket(self):
+        store = throttling.LocalBucketStore()
+
+        taken = [store.take('key', 2, 1, 100)[0] for _ in range(3)]
+        self.assertEqual(taken, [True, True, False])
+        self.assertTrue(store.take('key', 2, 1, 101)[0])
+        self.assertTrue(store.take('other', 2, 1, 101)[0])
+
+    def test_local_bucket_is_bounded(self):
+        store = throttling.LocalBucketStore(size=2)
+
+        for key in ('a', 'b', 'c'):
+            store.take(key, 1, 1, 100)
+
+        self.assertEqual(list(store._buckets), ['b', 'c'])
+
+    def test_cache_bucket_falls_back_to_local(self):
+        fallback = throttling.LocalBucketStore()
+        store = throttling.CacheBucketStore(fallback)
+
+        with mock.patch.object(throttling.cache, 'get',
+                               side_effect=ConnectionError), \
+                self.assertLogs('core.throttling', 'WARNING'):
+            store.take('key', 1, 1, 100)
+
+        self.assertIn('key', fallback._buckets)
+
+
+class ThrottleApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = get_user_model().objects.create_user(
+            "test@londonappdev.com", "testpass",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @rates(read='2/min', write='5/min')
+    def test_read_scope(self):
+        codes = [self.client.get(TAGS_URL).status_code for _ in range(3)]
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(codes, [200, 200, 429])
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    @rates(read='1/min')
+    def test_throttled_response_has_retry_after(self):
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '60')
+
+    @rates(read='1/min')
+    def test_buckets_are_per_user(self):
+        other = get_user_model().objects.create_user(
+            "other@londonappdev.com", "testpass",
+        )
+        self.client.get(TAGS_URL)
+        self.client.force_authenticate(other)
+
+        res = self.client.get(TAGS_URL, REMOTE_ADDR='10.0.0.2')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @rates(read='5/min', read_ip='1/min')
+    def test_authenticated_requests_share_the_ip_bucket(self):
+        other = get_user_model().objects.create_user(
+            "other@londonappdev.com", "testpass",
+        )
+        self.client.get(TAGS_URL)
+        self.client.force_authenticate(other)
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @rates(read='2/min', read_ip='1/min')
+    def test_denied_request_takes_no_token(self):
+        self.client.get(TAGS_URL)
+        denied = self.client.get(TAGS_URL)
+
+        # the user bucket still has its second token
+        res = self.client.get(TAGS_URL, REMOTE_ADDR='10.0.0.2')
+
+        self.assertEqual(denied.status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @rates(write='5/min', upload='1/min')
+    def test_upload_scope(self):
+        recipe = Recipe.objects.create(
+            user=self.user, title='title', time_minutes=10, price=5,
+        )
+        url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+
+        first = self.client.post(url, {'image': 'notimage'})
+        second = self.client.post(url, {'image': 'notimage'})
+
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(second.status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @rates(login='1/min')
+    def test_login_scope_is_per_ip(self):
+        client = APIClient()
+        payload = {'email': 'test@londonappdev.com', 'password': 'wrong'}
+
+        first = client.post(TOKEN_URL, payload)
+        second = client.post(TOKEN_URL, payload, REMOTE_ADDR='10.0.0.2')
+        third = client.post(TOKEN_URL, payload)
+
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(second.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(third.status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class AdmissionControlMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.middleware = AdmissionControlMiddleware(
+            lambda request: HttpResponse(),
+        )
+        self.request = RequestFactory().get('/')
+
+    @override_settings(MAX_REQUESTS_IN_FLIGHT=1, ADMISSION_RETRY_AFTER=2)
+    def test_sheds_load_over_limit(self):
+        self.middleware.in_flight = 1
+
+        res = self.middleware(self.request)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res['Retry-After'], '2')
+
+    @override_settings(MAX_REQUESTS_IN_FLIGHT=1)
+    def test_releases_slot(self):
+        for _ in range(2):
+            self.assertEqual(self.middleware(self.request).status_code, 200)
+
+        self.assertEqual(self.middleware.in_flight, 0)
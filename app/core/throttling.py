@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'100/min' -> (100 tokens, 100 / 60 tokens a second)"""
+    if rate is None:
+        return None
+
+    count, period = rate.split('/')
+    capacity = int(count)
+
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def _refill(state, capacity, per_second, now):
+    tokens, updated = state or (capacity, now)
+
+    return min(capacity, tokens + (now - updated) * per_second)
+
+
+class LocalBucketStore:
+    """Token buckets of this process, for when the cache is unavailable."""
+
+    def __init__(self, size=10000):
+        self.size = size
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tokens(self, key, capacity, per_second, now):
+        with self._lock:
+            return _refill(self._buckets.get(key), capacity, per_second, now)
+
+    def take(self, key, capacity, per_second, now):
+        with self._lock:
+            tokens = _refill(self._buckets.pop(key, None), capacity,
+                             per_second, now)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - allowed, now)
+            while len(self._buckets) > self.size:
+                self._buckets.popitem(last=False)
+
+        return allowed, tokens
+
+
+class CacheBucketStore:
+    """Token buckets shared by all processes through the Django cache.
+
+    Concurrent requests of one client can both read the same bucket, so a
+    burst may let a few requests more through than its capacity; a bucket
+    never grows past its capacity though.
+    """
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def tokens(self, key, capacity, per_second, now):
+        try:
+            return _refill(cache.get(key), capacity, per_second, now)
+        except Exception:
+            logger.warning('Throttle cache unavailable, using local buckets',
+                           exc_info=True)
+            return self.fallback.tokens(key, capacity, per_second, now)
+
+    def take(self, key, capacity, per_second, now):
+        try:
+            tokens = _refill(cache.get(key), capacity, per_second, now)
+            allowed = tokens >= 1
+            # expires once refilled, a missing bucket is a full one
+            cache.set(key, (tokens - allowed, now),
+                      int(capacity / per_second) + 1)
+        except Exception:
+            logger.warning('Throttle cache unavailable, using local buckets',
+                           exc_info=True)
+            return self.fallback.take(key, capacity, per_second, now)
+
+        return allowed, tokens
+
+
+store = CacheBucketStore(LocalBucketStore())
+
+
+class ScopedBucketThrottle(BaseThrottle):
+    """Token buckets per scope and client.
+
+    The scope is the view's `throttle_scope`, or `read` / `write` by request
+    method. Requests before login are bucketed by IP address with the rate
+    of their scope. Authenticated ones are bucketed by user with that rate,
+    and by IP address with the `<scope>_ip` rate, so the users behind one
+    address get a budget of their own. Rates are DEFAULT_THROTTLE_RATES
+    entries: '600/min' allows bursts of 600 requests, refilled at 10 a
+    second; buckets without a rate are not throttled.
+
+    A request takes a token from its buckets only when all of them have one.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None) or (
+            'read' if request.method in SAFE_METHODS else 'write'
+        )
+        ip = f'ip:{self.get_ident(request)}'
+        if request.user and request.user.is_authenticated:
+            idents = [(scope, f'user:{request.user.pk}'), (f'{scope}_ip', ip)]
+        else:
+            idents = [(scope, ip)]
+
+        now = time.time()
+        buckets = []
+        for bucket_scope, ident in idents:
+            rate = parse_rate(
+                api_settings.DEFAULT_THROTTLE_RATES.get(bucket_scope),
+            )
+            if rate is None:
+                continue
+
+            key = f'throttle:{bucket_scope}:{ident}'
+            capacity, per_second = rate
+            tokens = store.tokens(key, capacity, per_second, now)
+            if tokens < 1:
+                self.tokens, self.per_second = tokens, per_second
+                return False
+            buckets.append((key, capacity, per_second))
+
+        for key, capacity, per_second in buckets:
+            store.take(key, capacity, per_second, now)
+
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) / self.per_second
@@ -0,0 +1,22 @@
+from rest_framework import status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.middleware import request_stats
+from user.authentication import CachedTokenAuthentication
+
+
+class RequestStatsView(APIView):
+    authentication_classes = (CachedTokenAuthentication,
+                              SessionAuthentication)
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(request_stats.snapshot())
+
+    def delete(self, request):
+        request_stats.reset()
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
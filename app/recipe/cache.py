@@ -0,0 +1,84 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _version_key(user_id, scope):
+    return f'{scope}:version:{user_id}'
+
+
+def _new_version():
+    # a random start, so versions lost with an evicted key are not reused
+    return uuid.uuid4().int >> 66
+
+
+def get_version(user_id, scope='recipe'):
+    key = _version_key(user_id, scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_version(user_id, scope='recipe'):
+    """Moves to a new version and returns it. Concurrent bumps never get
+    the same one."""
+    key = _version_key(user_id, scope)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _new_version(), None)
+        return cache.incr(key)
+
+
+def bump_version_on_commit(user_id, scope='recipe'):
+    """Bumps the version once the current transaction commits.
+
+    Bumped earlier, a concurrent read could still see the old rows and
+    cache them under the new version.
+    """
+    transaction.on_commit(lambda: bump_version(user_id, scope))
+
+
+class VersionedCacheMixin:
+    """Caches GET responses per user until any of their data changes."""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        version = get_version(request.user.id)
+        digest = hashlib.md5('{}:{}:{}'.format(
+            version,
+            request.accepted_media_type,
+            request.get_full_path(),
+        ).encode()).hexdigest()
+        key = f'recipe:response:{request.user.id}:{digest}'
+        etag = quote_etag(digest)
+
+        # no Last-Modified, two writes within one second would share it
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            data = cache.get(key)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+            else:
+                response = Response(data)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+
+        return response
@@ -0,0 +1,101 @@
+import csv
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.negotiation import BaseContentNegotiation
+
+from core.models import Recipe
+
+EXPORT_FIELDS = ('id', 'title', 'time_minutes', 'price', 'link')
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Exports pick their format from a query parameter, not Accept."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def iter_recipes(queryset, chunk_size=None):
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    rows = queryset.order_by('id') \
+        .values_list(*EXPORT_FIELDS) \
+        .iterator(chunk_size=chunk_size)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        recipe_ids = [row[0] for row in chunk]
+        tags = _related_by_recipe(Recipe.tags.through, 'tag', recipe_ids)
+        ingredients = _related_by_recipe(
+            Recipe.ingredients.through, 'ingredient', recipe_ids,
+        )
+
+        for row in chunk:
+            recipe = dict(zip(EXPORT_FIELDS, row))
+            recipe['ingredients'] = ingredients.get(recipe['id'], [])
+            recipe['tags'] = tags.get(recipe['id'], [])
+            yield recipe
+
+
+def _related_by_recipe(through, field, recipe_ids):
+    related = defaultdict(list)
+    rows = through.objects \
+        .filter(recipe_id__in=recipe_ids) \
+        .order_by(f'{field}_id') \
+        .values_list('recipe_id', f'{field}_id', f'{field}__name')
+
+    for recipe_id, related_id, name in rows:
+        related[recipe_id].append({'id': related_id, 'name': name})
+
+    return related
+
+
+def iter_jsonl(recipes):
+    encoder = DjangoJSONEncoder()
+    for recipe in recipes:
+        yield encoder.encode(recipe) + '\n'
+
+
+def iter_csv(recipes):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS + ('ingredients', 'tags'))
+
+    for recipe in recipes:
+        yield writer.writerow(
+            [recipe[field] for field in EXPORT_FIELDS] + [
+                ';'.join(item['name'] for item in recipe['ingredients']),
+                ';'.join(item['name'] for item in recipe['tags']),
+            ]
+        )
+
+
+EXPORT_FORMATS = {
+    'jsonl': (iter_jsonl, 'application/x-ndjson'),
+    'csv': (iter_csv, 'text/csv'),
+}
+
+
+def export_response(queryset, export_format):
+    render, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        render(iter_recipes(queryset)),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = \
+        f'attachment; filename="recipes.{export_format}"'
+
+    return response
@@ -0,0 +1,272 @@
+import io
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+from core.models import Recipe, recipe_image_file_path
+from core.signals import bulk_changed
+
+logger = logging.getLogger(__name__)
+
+EXIF_ORIENTATION = 274
+ORIENTATION_TRANSPOSES = {
+    2: (Image.FLIP_LEFT_RIGHT,),
+    3: (Image.ROTATE_180,),
+    4: (Image.FLIP_TOP_BOTTOM,),
+    5: (Image.FLIP_LEFT_RIGHT, Image.ROTATE_90),
+    6: (Image.ROTATE_270,),
+    7: (Image.FLIP_LEFT_RIGHT, Image.ROTATE_270),
+    8: (Image.ROTATE_90,),
+}
+
+
+class FileQueue:
+    """Directory backed job queue, one file per recipe id.
+
+    Jobs are claimed by renaming them, which is atomic, so any number of
+    threads or processes can consume the same directory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def put(self, recipe_id):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = os.path.join(self.path, f'.{uuid.uuid4().hex}.tmp')
+        with open(tmp_path, 'w') as job:
+            job.write(str(recipe_id))
+        os.replace(tmp_path, self._job_path(recipe_id, 'job'))
+
+    def claim(self, recipe_id):
+        try:
+            os.rename(
+                self._job_path(recipe_id, 'job'),
+                self._job_path(recipe_id, 'working'),
+            )
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def done(self, recipe_id):
+        try:
+            os.remove(self._job_path(recipe_id, 'working'))
+        except FileNotFoundError:
+            pass
+
+    def pending(self, state='job'):
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+
+        suffix = f'.{state}'
+        return sorted(
+            int(name[:-len(suffix)])
+            for name in names if name.endswith(suffix)
+        )
+
+    def requeue_unfinished(self):
+        for recipe_id in self.pending('working'):
+            os.replace(
+                self._job_path(recipe_id, 'working'),
+                self._job_path(recipe_id, 'job'),
+            )
+
+    def _job_path(self, recipe_id, state):
+        return os.path.join(self.path, f'{recipe_id}.{state}')
+
+
+class ImageWorkerPool:
+    def __init__(self, queue, workers):
+        self.queue = queue
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, recipe_id):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='recipe-images',
+                )
+
+        return self._executor.submit(self.run_job, recipe_id)
+
+    def run_job(self, recipe_id):
+        if not self.queue.claim(recipe_id):
+            return
+
+        close_old_connections()
+        try:
+            process_recipe_image(recipe_id)
+        finally:
+            self.queue.done(recipe_id)
+            close_old_connections()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+queue = FileQueue(settings.IMAGE_QUEUE_DIR)
+pool = ImageWorkerPool(queue, settings.IMAGE_PROCESSING_WORKERS)
+
+
+def enqueue(recipe_id):
+    if settings.IMAGE_PROCESSING_EAGER:
+        process_recipe_image(recipe_id)
+        return
+
+    def submit():
+        queue.put(recipe_id)
+        if settings.IMAGE_PROCESSING_WORKERS:
+            pool.submit(recipe_id)
+
+    transaction.on_commit(submit)
+
+
+def process_recipe_image(recipe_id):
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is None or not recipe.image:
+        return
+
+    original = recipe.image.name
+    storage = recipe.image.storage
+    if not _set_image_fields(recipe, original,
+                             image_status=Recipe.IMAGE_PROCESSING):
+        return
+    try:
+        fields = _write_variants(recipe)
+    except Exception:
+        logger.exception('Processing image of recipe %s failed', recipe_id)
+        _set_image_fields(recipe, original, image_status=Recipe.IMAGE_FAILED)
+        return
+
+    written = [name for name in fields.values() if name != original]
+    if not _set_image_fields(recipe, original,
+                             image_status=Recipe.IMAGE_READY, **fields):
+        # a newer upload replaced the image meanwhile, its own job runs
+        _delete_files(storage, written)
+        return
+
+    # the recipe points at the re-encoded copy only now
+    if fields['image'] != original:
+        storage.delete(original)
+
+
+def image_files(recipe):
+    """Names of the stored image of the recipe and of its variants."""
+    return [
+        field.name
+        for field in (recipe.image, recipe.image_thumbnail, recipe.image_webp)
+        if field
+    ]
+
+
+def delete_on_commit(storage, names):
+    names = list(names)
+    transaction.on_commit(lambda: _delete_files(storage, names))
+
+
+def _delete_files(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+def _write_variants(recipe):
+    storage = recipe.image.storage
+    name = recipe.image.name
+
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image_format = image.format
+        image.load()
+
+    image = _apply_orientation(image)
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGB')
+
+    written = []
+
+    def save(name, content):
+        written.append(storage.save(name, content))
+        return written[-1]
+
+    # Re-encoding without the exif argument drops all EXIF metadata. The
+    # result gets a new name, so a file never changes once written and can
+    # be cached forever, see core.media.
+    try:
+        name = save(
+            recipe_image_file_path(recipe, name),
+            _encode(image, image_format),
+        )
+        base = os.path.splitext(name)[0]
+
+        thumbnail = image.copy()
+        thumbnail.thumbnail(settings.IMAGE_THUMBNAIL_SIZE, Image.LANCZOS)
+        thumbnail_name = save(
+            f'{base}-thumb.jpg',
+            _encode(thumbnail.convert('RGB'), 'JPEG', quality=85),
+        )
+
+        display = image.copy()
+        display.thumbnail(settings.IMAGE_WEBP_SIZE, Image.LANCZOS)
+        webp_name = save(
+            f'{base}.webp',
+            _encode(display, 'WEBP', quality=80),
+        )
+    except Exception:
+        # nothing refers to them, the recipe keeps its original
+        _delete_files(storage, written)
+        raise
+
+    return {
+        'image': name,
+        'image_thumbnail': thumbnail_name,
+        'image_webp': webp_name,
+    }
+
+
+def _apply_orientation(image):
+    try:
+        orientation = image._getexif().get(EXIF_ORIENTATION)
+    except (AttributeError, KeyError, IndexError, TypeError):
+        orientation = None
+
+    for method in ORIENTATION_TRANSPOSES.get(orientation, ()):
+        image = image.transpose(method)
+
+    return image
+
+
+def _encode(image, image_format, **options):
+    buffer = io.BytesIO()
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(buffer, format=image_format or 'PNG', **options)
+
+    return ContentFile(buffer.getvalue())
+
+
+def _set_image_fields(recipe, original, **fields):
+    """Updates the recipe unless its image is no longer `original`, and
+    tells whether it did."""
+    if not Recipe.objects \
+            .filter(id=recipe.id, image=original) \
+            .update(**fields):
+        return False
+
+    bulk_changed.send(sender=Recipe, user_id=recipe.user_id, ids=[recipe.id])
+
+    return True
@@ -0,0 +1,192 @@
+import csv
+import json
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+
+from core.bulk import bulk_create_with_pks
+from core.models import Tag, Ingredient, Recipe, ImportCheckpoint
+from core.signals import bulk_changed
+from recipe import sync
+
+LOOKUP_BATCH_SIZE = 500
+
+ParsedRecipe = namedtuple('ParsedRecipe', ('fields', 'tags', 'ingredients'))
+
+
+class InvalidRecipeRow(ValueError):
+    def __init__(self, number, message):
+        super().__init__(f'Row {number}: {message}')
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    for row in csv.DictReader(stream):
+        for field in ('tags', 'ingredients'):
+            row[field] = [name for name in row.get(field, '').split(';')
+                          if name]
+        yield row
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+def read_checkpoint(user, name):
+    return ImportCheckpoint.objects \
+        .filter(user=user, name=name) \
+        .values_list('offset', flat=True) \
+        .first() or 0
+
+
+class RecipeImporter:
+    def __init__(self, user, batch_size=1000):
+        self.user = user
+        self.batch_size = batch_size
+        self.tag_ids = self._load_ids(Tag)
+        self.ingredient_ids = self._load_ids(Ingredient)
+
+    def import_records(self, records, offset=0, checkpoint=None):
+        """Imports records in batches, yielding the offset after each one.
+
+        Every batch is committed in its own transaction, together with the
+        offset after it in the `checkpoint` named ImportCheckpoint, so an
+        import can resume from there after a crash.
+        """
+        records = islice(records, offset, None)
+        while True:
+            batch = [
+                self._parse(record, offset + index + 1)
+                for index, record in enumerate(
+                    islice(records, self.batch_size)
+                )
+            ]
+            if not batch:
+                return
+
+            offset += len(batch)
+            with transaction.atomic():
+                sync.lock(self.user.id)
+                self._import_batch(batch)
+                if checkpoint is not None:
+                    ImportCheckpoint.objects.update_or_create(
+                        user=self.user, name=checkpoint,
+                        defaults={'offset': offset},
+                    )
+
+            yield offset
+
+    def _import_batch(self, batch):
+        self._resolve(Tag, self.tag_ids, batch, 'tags')
+        self._resolve(Ingredient, self.ingredient_ids, batch, 'ingredients')
+
+        recipes = bulk_create_with_pks(Recipe, [
+            Recipe(user=self.user, **parsed.fields) for parsed in batch
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag_id)
+            for recipe, parsed in zip(recipes, batch)
+            for tag_id in {self.tag_ids[name] for name in parsed.tags}
+        ])
+        Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(
+                recipe_id=recipe.id, ingredient_id=ingredient_id,
+            )
+            for recipe, parsed in zip(recipes, batch)
+            for ingredient_id in {
+                self.ingredient_ids[name] for name in parsed.ingredients
+            }
+        ])
+
+        bulk_changed.send(
+            sender=Recipe,
+            user_id=self.user.id,
+            ids=[recipe.id for recipe in recipes],
+        )
+
+    def _load_ids(self, model):
+        # ordered so that duplicated names resolve to the oldest row
+        return dict(
+            model.objects
+            .filter(user=self.user)
+            .order_by('-id')
+            .values_list('name', 'id')
+        )
+
+    def _resolve(self, model, ids_by_name, batch, field):
+        missing = sorted({
+            name for parsed in batch for name in getattr(parsed, field)
+            if name not in ids_by_name
+        })
+        if not missing:
+            return
+
+        model.objects.bulk_create(
+            [model(user=self.user, name=name) for name in missing]
+        )
+        for start in range(0, len(missing), LOOKUP_BATCH_SIZE):
+            ids_by_name.update(
+                model.objects
+                .filter(
+                    user=self.user,
+                    name__in=missing[start:start + LOOKUP_BATCH_SIZE],
+                )
+                .values_list('name', 'id')
+            )
+        bulk_changed.send(
+            sender=model,
+            user_id=self.user.id,
+            ids=[ids_by_name[name] for name in missing],
+        )
+
+    def _parse(self, record, number):
+        if not isinstance(record, dict):
+            raise InvalidRecipeRow(number, 'expected an object')
+
+        title = (record.get('title') or '').strip()
+        if not title or len(title) > 255:
+            raise InvalidRecipeRow(number, 'title is required (max 255)')
+
+        link = record.get('link') or ''
+        if len(link) > 255:
+            raise InvalidRecipeRow(number, 'link is too long (max 255)')
+
+        try:
+            time_minutes = int(record.get('time_minutes'))
+            price = Decimal(str(record.get('price'))).quantize(Decimal('.01'))
+        except (TypeError, ValueError, InvalidOperation):
+            raise InvalidRecipeRow(number, 'invalid time_minutes or price')
+        if abs(price) >= 1000:
+            raise InvalidRecipeRow(number, 'price must be below 1000')
+
+        fields = {
+            'title': title,
+            'time_minutes': time_minutes,
+            'price': price,
+            'link': link,
+        }
+
+        return ParsedRecipe(
+            fields,
+            self._names(record.get('tags'), number),
+            self._names(record.get('ingredients'), number),
+        )
+
+    def _names(self, values, number):
+        names = []
+        for value in values or ():
+            name = value.get('name') if isinstance(value, dict) else value
+            if not isinstance(name, str) or not name.strip():
+                raise InvalidRecipeRow(number, 'invalid tag or ingredient')
+            names.append(name.strip()[:255])
+
+        return names
@@ -0,0 +1,72 @@
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe.importer import READERS, InvalidRecipeRow, RecipeImporter, \
+    read_checkpoint
+
+
+class Command(BaseCommand):
+    help = 'Stream recipes for one user from a JSON Lines or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Owner email')
+        parser.add_argument('--format', choices=sorted(READERS))
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Name of the stored offset, defaults to the absolute path',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip the rows recorded in the checkpoint',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or \
+            os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Unknown format "{file_format}", use --format')
+
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["user"]}')
+
+        checkpoint = options['checkpoint'] or os.path.abspath(path)
+        offset = read_checkpoint(user, checkpoint) \
+            if options['resume'] else 0
+        importer = RecipeImporter(user, batch_size=options['batch_size'])
+
+        started = time.monotonic()
+        imported = 0
+        with open(path, newline='', encoding='utf-8') as stream:
+            batches = importer.import_records(
+                READERS[file_format](stream),
+                offset=offset,
+                checkpoint=checkpoint,
+            )
+            try:
+                for new_offset in batches:
+                    imported += new_offset - offset
+                    offset = new_offset
+                    self.stdout.write(self._progress(imported, started))
+            except (InvalidRecipeRow, ValueError) as error:
+                raise CommandError(
+                    f'{error} (resume from offset {offset} with --resume)'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done. {self._progress(imported, started)}'
+        ))
+
+    def _progress(self, imported, started):
+        elapsed = max(time.monotonic() - started, 1e-9)
+
+        return f'Imported {imported} recipes ' \
+               f'({imported / elapsed:.0f} recipes/s)'
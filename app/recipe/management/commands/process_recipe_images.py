@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.images import FileQueue, ImageWorkerPool
+
+
+class Command(BaseCommand):
+    help = 'Process queued recipe images with a local worker pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty',
+        )
+        parser.add_argument(
+            '--recover',
+            action='store_true',
+            help='Requeue jobs left unfinished by a crashed worker',
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='Queue recipes whose image was never processed',
+        )
+
+    def handle(self, *args, **options):
+        queue = FileQueue(settings.IMAGE_QUEUE_DIR)
+
+        if options['backfill']:
+            recipe_ids = Recipe.objects \
+                .exclude(image='') \
+                .exclude(image=None) \
+                .filter(image_status='') \
+                .values_list('id', flat=True)
+            for recipe_id in recipe_ids.iterator():
+                queue.put(recipe_id)
+
+        if options['recover']:
+            queue.requeue_unfinished()
+
+        pool = ImageWorkerPool(queue, options['workers'])
+        try:
+            while True:
+                futures = [pool.submit(job) for job in queue.pending()]
+                for future in futures:
+                    future.result()
+                if futures:
+                    self.stdout.write(f'Processed {len(futures)} images')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        finally:
+            pool.shutdown()
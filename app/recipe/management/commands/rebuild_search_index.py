@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.search import INDEX_BATCH_SIZE, index_recipes
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the recipe search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only this user id')
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.order_by('id')
+        if options['user']:
+            queryset = queryset.filter(user_id=options['user'])
+
+        batch, total = [], 0
+        for recipe_id in queryset.values_list('id', flat=True).iterator():
+            batch.append(recipe_id)
+            if len(batch) == INDEX_BATCH_SIZE:
+                index_recipes(batch)
+                total += len(batch)
+                batch = []
+        index_recipes(batch)
+        total += len(batch)
+
+        self.stdout.write(f'Indexed {total} recipes')
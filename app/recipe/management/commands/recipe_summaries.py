@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Recipe
+from recipe import summary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the denormalized recipe summaries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=('rebuild', 'verify'))
+        parser.add_argument('--user', type=int, help='Only this user id')
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.order_by('id')
+        if options['user']:
+            queryset = queryset.filter(user_id=options['user'])
+        recipe_ids = list(queryset.values_list('id', flat=True))
+
+        if options['action'] == 'rebuild':
+            summary.rebuild(recipe_ids)
+            self.stdout.write(f'Rebuilt {len(recipe_ids)} summaries')
+            return
+
+        mismatched = summary.verify(recipe_ids)
+        if mismatched:
+            raise CommandError(
+                f'{len(mismatched)} of {len(recipe_ids)} summaries are '
+                f'missing or stale, e.g. recipes {mismatched[:10]}'
+            )
+        self.stdout.write(f'All {len(recipe_ids)} summaries are up to date')
@@ -0,0 +1,199 @@
+import threading
+from collections import OrderedDict, defaultdict, namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from core.models import Recipe
+from recipe.cache import bump_version, get_version
+
+VERSION_SCOPE = 'recipe-matrix'
+LOAD_BATCH_SIZE = 500
+
+Match = namedtuple('Match', ('recipe_id', 'missing', 'total'))
+
+
+def _extend(array, values):
+    return np.concatenate([array, np.asarray(values, dtype=array.dtype)])
+
+
+class IngredientMatrix:
+    """Sparse recipe x ingredient matrix of one user.
+
+    Every (recipe, ingredient) link is stored as a row and a column index in
+    two parallel arrays, so ranking is a couple of vectorized passes over
+    the links. Rows listed in `dirty` are reloaded before the next ranking,
+    so writes only cost a set insert.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.lock = threading.Lock()
+        self.dirty = set()
+        self.rows = {}
+        self.columns = {}
+        self.ingredient_ids = []
+        self.recipe_ids = np.zeros(0, dtype=np.int64)
+        self.totals = np.zeros(0, dtype=np.int64)
+        self.link_rows = np.zeros(0, dtype=np.int64)
+        self.link_columns = np.zeros(0, dtype=np.int64)
+
+    def apply(self, recipe_ids, links):
+        """Replaces the links of recipe_ids with the given (recipe,
+        ingredient) pairs."""
+        links = np.array(links, dtype=np.int64).reshape(-1, 2)
+        self._add_rows(np.unique(links[:, 0]).tolist())
+        self._add_columns(np.unique(links[:, 1]).tolist())
+
+        replaced = [self.rows[pk] for pk in recipe_ids if pk in self.rows]
+        keep = ~np.isin(self.link_rows, replaced)
+        self.link_rows = _extend(
+            self.link_rows[keep],
+            [self.rows[pk] for pk in links[:, 0].tolist()],
+        )
+        self.link_columns = _extend(
+            self.link_columns[keep],
+            [self.columns[pk] for pk in links[:, 1].tolist()],
+        )
+        self.totals = np.bincount(self.link_rows, minlength=len(self.rows))
+
+    def recipes_using(self, ingredient_ids):
+        columns = [
+            self.columns[pk] for pk in ingredient_ids if pk in self.columns
+        ]
+        rows = np.unique(
+            self.link_rows[np.isin(self.link_columns, columns)]
+        )
+
+        return self.recipe_ids[rows].tolist()
+
+    def refresh(self):
+        recipe_ids = sorted(self.dirty)
+        self.dirty.clear()
+        for start in range(0, len(recipe_ids), LOAD_BATCH_SIZE):
+            chunk = recipe_ids[start:start + LOAD_BATCH_SIZE]
+            self.apply(chunk, load_links(recipe_id__in=chunk))
+
+    def rank(self, ingredient_ids, limit):
+        """Recipes with every ingredient available first, then by the number
+        of missing ingredients; recipes without ingredients are skipped."""
+        have = np.zeros(len(self.ingredient_ids), dtype=bool)
+        have[[
+            self.columns[pk] for pk in ingredient_ids if pk in self.columns
+        ]] = True
+
+        available = have[self.link_columns]
+        matched = np.bincount(
+            self.link_rows[available], minlength=len(self.rows),
+        )
+        missing = self.totals - matched
+        live = np.flatnonzero(self.totals)
+        order = live[np.lexsort((
+            self.recipe_ids[live],
+            -matched[live],
+            missing[live],
+        ))][:limit]
+
+        lacking = ~available & np.isin(self.link_rows, order)
+        missing_ids = defaultdict(list)
+        for row, column in zip(self.link_rows[lacking].tolist(),
+                               self.link_columns[lacking].tolist()):
+            missing_ids[row].append(self.ingredient_ids[column])
+
+        return [
+            Match(
+                recipe_id=int(self.recipe_ids[row]),
+                missing=sorted(missing_ids[row]),
+                total=int(self.totals[row]),
+            )
+            for row in order.tolist()
+        ]
+
+    def _add_rows(self, recipe_ids):
+        new = [pk for pk in recipe_ids if pk not in self.rows]
+        for row, pk in enumerate(new, len(self.rows)):
+            self.rows[pk] = row
+        self.recipe_ids = _extend(self.recipe_ids, new)
+
+    def _add_columns(self, ingredient_ids):
+        new = [pk for pk in ingredient_ids if pk not in self.columns]
+        for column, pk in enumerate(new, len(self.ingredient_ids)):
+            self.columns[pk] = column
+        self.ingredient_ids.extend(new)
+
+
+def load_links(**filters):
+    return list(
+        Recipe.ingredients.through.objects
+        .filter(**filters)
+        .order_by()
+        .values_list('recipe_id', 'ingredient_id')
+    )
+
+
+class MatrixStore:
+    """Per process LRU of ingredient matrices.
+
+    A matrix is used while its version matches the shared one, so writes
+    made by other processes cause a full reload; writes made here only mark
+    the affected rows as dirty.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._matrices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rank(self, user_id, ingredient_ids, limit):
+        matrix = self._matrix(user_id)
+        with matrix.lock:
+            matrix.refresh()
+            return matrix.rank(ingredient_ids, limit)
+
+    def invalidate(self, user_id, recipe_ids=(), ingredient_ids=()):
+        """Marks the affected rows as dirty once the transaction commits."""
+        recipe_ids, ingredient_ids = list(recipe_ids), list(ingredient_ids)
+        transaction.on_commit(
+            lambda: self._invalidate(user_id, recipe_ids, ingredient_ids),
+        )
+
+    def _invalidate(self, user_id, recipe_ids, ingredient_ids):
+        version = bump_version(user_id, VERSION_SCOPE)
+        with self._lock:
+            matrix = self._matrices.get(user_id)
+        if matrix is None:
+            return
+
+        with matrix.lock:
+            # any other bump since the matrix was loaded forces a reload
+            if matrix.version == version - 1:
+                matrix.dirty.update(recipe_ids)
+                matrix.dirty.update(matrix.recipes_using(ingredient_ids))
+                matrix.version = version
+
+    def reset(self, user_id):
+        bump_version(user_id, VERSION_SCOPE)
+        with self._lock:
+            self._matrices.pop(user_id, None)
+
+    def _matrix(self, user_id):
+        version = get_version(user_id, VERSION_SCOPE)
+        with self._lock:
+            matrix = self._matrices.get(user_id)
+            if matrix is not None and matrix.version == version:
+                self._matrices.move_to_end(user_id)
+                return matrix
+
+        matrix = IngredientMatrix(version)
+        matrix.apply([], load_links(recipe__user_id=user_id))
+        with self._lock:
+            self._matrices[user_id] = matrix
+            self._matrices.move_to_end(user_id)
+            while len(self._matrices) > self.size:
+                self._matrices.popitem(last=False)
+
+        return matrix
+
+
+store = MatrixStore(settings.INGREDIENT_MATRIX_USERS)
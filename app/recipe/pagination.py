@@ -0,0 +1,23 @@
+from rest_framework.pagination import CursorPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class TagCursorPagination(BaseCursorPagination):
+    ordering = '-name'
+
+
+class IngredientCursorPagination(BaseCursorPagination):
+    ordering = 'id'
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    ordering = 'id'
+
+
+class RecipeSummaryCursorPagination(BaseCursorPagination):
+    # same positions as RecipeCursorPagination, so cursors are interchangeable
+    ordering = 'recipe_id'
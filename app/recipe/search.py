@@ -0,0 +1,160 @@
+import re
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db.models import Case, IntegerField, Max, Q, Sum, When
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+from core.models import Recipe, RecipeSearchTerm
+
+TERM_MAX_LENGTH = 64
+MAX_QUERY_TERMS = 8
+INDEX_BATCH_SIZE = 500
+
+TITLE_WEIGHT = 3
+TAG_WEIGHT = 2
+INGREDIENT_WEIGHT = 1
+EXACT_MATCH_BONUS = 1
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+class SearchPagination(CursorPagination):
+    """Keyset pagination over the (score, recipe id) order of search().
+
+    The cursor holds the score and id of the last result of a page, so a
+    page costs neither a COUNT nor an OFFSET. Pages only go forward.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-score', 'recipe_id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            try:
+                score, recipe_id = map(int, cursor.position.split(':'))
+            except (AttributeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(
+                Q(score__lt=score) | Q(score=score, recipe_id__gt=recipe_id)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        recipe_id, score = self.page[-1]
+
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False, position=f'{score}:{recipe_id}',
+        ))
+
+    def get_previous_link(self):
+        return None
+
+
+def tokenize(text):
+    return [
+        token[:TERM_MAX_LENGTH]
+        for token in TOKEN_RE.findall((text or '').lower())
+    ]
+
+
+def index_recipes(recipe_ids):
+    """Rebuilds the index rows of the given recipes."""
+    recipe_ids = sorted(set(recipe_ids))
+    for start in range(0, len(recipe_ids), INDEX_BATCH_SIZE):
+        _index_chunk(recipe_ids[start:start + INDEX_BATCH_SIZE])
+
+
+def _index_chunk(recipe_ids):
+    weights = defaultdict(lambda: defaultdict(int))
+    owners = {}
+
+    recipes = Recipe.objects \
+        .filter(id__in=recipe_ids) \
+        .values_list('id', 'user_id', 'title')
+    for recipe_id, user_id, title in recipes:
+        owners[recipe_id] = user_id
+        for term in tokenize(title):
+            weights[recipe_id][term] += TITLE_WEIGHT
+
+    for through, field, weight in (
+            (Recipe.tags.through, 'tag__name', TAG_WEIGHT),
+            (Recipe.ingredients.through, 'ingredient__name',
+             INGREDIENT_WEIGHT),
+    ):
+        rows = through.objects \
+            .filter(recipe_id__in=recipe_ids) \
+            .values_list('recipe_id', field)
+        for recipe_id, name in rows:
+            for term in tokenize(name):
+                weights[recipe_id][term] += weight
+
+    RecipeSearchTerm.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeSearchTerm.objects.bulk_create([
+        RecipeSearchTerm(
+            user_id=owners[recipe_id],
+            recipe_id=recipe_id,
+            term=term,
+            weight=weight,
+        )
+        for recipe_id, terms in weights.items() if recipe_id in owners
+        for term, weight in terms.items()
+    ])
+
+
+def _prefix_q(prefix):
+    # A range instead of LIKE 'prefix%' so the (user, term) b-tree is used
+    # whatever the collation or case sensitivity of the backend.
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    return Q(term__gte=prefix, term__lt=upper)
+
+
+def search(user, query):
+    """Recipe ids and scores matching every term of the query as a prefix.
+
+    Matches in titles weigh more than in tag names, which weigh more than in
+    ingredient names; whole-word matches get a bonus.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return RecipeSearchTerm.objects.none().order_by('recipe_id')
+
+    prefixes = [_prefix_q(term) for term in terms]
+    matched = {
+        f'matched_{index}': Max(Case(
+            When(prefix, then=1), default=0, output_field=IntegerField(),
+        ))
+        for index, prefix in enumerate(prefixes)
+    }
+
+    return RecipeSearchTerm.objects \
+        .filter(user=user) \
+        .filter(reduce(or_, prefixes)) \
+        .values('recipe_id') \
+        .annotate(
+            score=Sum('weight') + Sum(Case(
+                When(term__in=terms, then=EXACT_MATCH_BONUS),
+                default=0,
+                output_field=IntegerField(),
+            )),
+            **matched
+        ) \
+        .filter(**{name: 1 for name in matched}) \
+        .order_by('-score', 'recipe_id') \
+        .values_list('recipe_id', 'score')
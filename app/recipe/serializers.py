@@ -1,6 +1,254 @@
+import json
+
 from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.utils import html
+
+from core.bulk import bulk_create_with_pks, bulk_update
+from core.models import Tag, Ingredient, Recipe, RecipeSummary
+from core.signals import bulk_changed
+
+
+class RelatedResolver:
+    """Looks up one user's tags or ingredients by id or name.
+
+    Results are kept, so serializers sharing a resolver (the items of a bulk
+    write) only query for values not seen before. Names without a match
+    resolve to one unsaved object per name, see save_new_related.
+    """
+
+    def __init__(self, model, user):
+        self.model = model
+        self.user = user
+        self.by_id = {}
+        self.by_name = {}
+
+    def load(self, values):
+        ids, names = _split_ids_and_names(values)
+        ids = [pk for pk in ids if pk not in self.by_id]
+        if ids:
+            self.by_id.update(
+                self.model.objects.filter(user=self.user, id__in=ids)
+                .in_bulk()
+            )
+
+        names = [name for name in names if name not in self.by_name]
+        if names:
+            # the oldest object wins when several share a name
+            for obj in self.model.objects \
+                    .filter(user=self.user, name__in=names) \
+                    .order_by('-id'):
+                self.by_name[obj.name] = obj
+            for name in names:
+                self.by_name.setdefault(
+                    name, self.model(user=self.user, name=name),
+                )
+
+    def resolve(self, values):
+        self.load(values)
+        ids, names = _split_ids_and_names(values)
+        missing = [pk for pk in ids if pk not in self.by_id]
+        if missing:
+            raise serializers.ValidationError(
+                f'Invalid pks {", ".join(map(str, missing))} - objects do '
+                f'not exist.',
+                code='does_not_exist',
+            )
+
+        return list({
+            id(obj): obj for obj in (
+                self.by_id[value] if isinstance(value, int)
+                else self.by_name[value]
+                for value in _normalized(values)
+            )
+        }.values())
+
+
+def _normalized(values):
+    for value in values:
+        if isinstance(value, str) and value.strip().isdigit():
+            yield int(value)
+        elif isinstance(value, str):
+            yield value.strip()
+        else:
+            yield value
+
+
+def _split_ids_and_names(values):
+    ids, names = [], []
+    for value in _normalized(values):
+        (ids if isinstance(value, int) else names).append(value)
+
+    return ids, names
+
+
+def save_new_related(validated_data, fields):
+    """Creates the objects that names resolved to, once per name, and
+    returns them per model."""
+    created = {}
+    for attrs in validated_data:
+        for field in fields:
+            for obj in attrs.get(field, ()):
+                if obj.pk is None:
+                    created.setdefault(type(obj), {})[id(obj)] = obj
+
+    for model, objs in created.items():
+        objs = bulk_create_with_pks(model, objs.values())
+        bulk_changed.send(
+            sender=model,
+            user_id=objs[0].user_id,
+            ids=[obj.id for obj in objs],
+        )
+
+    return created
+
+
+class UserRelatedField(serializers.Field):
+    """Many-related field taking ids or names of the requesting user's
+    objects, all resolved with one query per kind of value.
+
+    Unknown names are created on save; unknown or foreign ids are reported
+    together.
+    """
+    default_error_messages = {
+        'not_a_list': 'Expected a list of ids or names but got type '
+                      '"{input_type}".',
+        'invalid': 'Expected an id or a name, got "{value}".',
+        'empty': 'This list may not be empty.',
+    }
+
+    def __init__(self, model, allow_empty=True, **kwargs):
+        self.model = model
+        self.allow_empty = allow_empty
+        super().__init__(**kwargs)
+
+    def get_value(self, dictionary):
+        # same as ManyRelatedField, form data carries repeated keys
+        if html.is_html_input(dictionary):
+            if self.field_name not in dictionary \
+                    and getattr(self.root, 'partial', False):
+                return empty
+            return dictionary.getlist(self.field_name)
+
+        return dictionary.get(self.field_name, empty)
+
+    def get_attribute(self, instance):
+        if getattr(instance, 'pk', None) is None:
+            return []
+
+        return super().get_attribute(instance).all()
+
+    def to_representation(self, value):
+        return [obj.pk for obj in value]
+
+    def resolver(self):
+        resolvers = self.context.setdefault('related_resolvers', {})
+        if self.model not in resolvers:
+            resolvers[self.model] = RelatedResolver(
+                self.model, self.context['request'].user,
+            )
+
+        return resolvers[self.model]
+
+    def to_internal_value(self, data):
+        if isinstance(data, (str, dict)) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        max_length = self.model._meta.get_field('name').max_length
+        for value in data:
+            valid = isinstance(value, int) and not isinstance(value, bool) \
+                or isinstance(value, str) \
+                and 0 < len(value.strip()) <= max_length
+            if not valid:
+                self.fail('invalid', value=value)
+
+        return self.resolver().resolve(data)
+
 
-from core.models import Tag, Ingredient, Recipe
+class BulkListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        model = self.child.Meta.model
+
+        return bulk_create_with_pks(
+            model,
+            [model(**attrs) for attrs in validated_data],
+        )
+
+    def update(self, instances, validated_data):
+        fields = set()
+        for instance, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+            fields.update(attrs)
+
+        # the rows are locked, rewriting unchanged fields loses no update
+        bulk_update(self.child.Meta.model, instances, sorted(fields))
+
+        return instances
+
+
+class RecipeBulkListSerializer(BulkListSerializer):
+    m2m_fields = {'ingredients': 'ingredient_id', 'tags': 'tag_id'}
+
+    def to_internal_value(self, data):
+        # resolves the ids and names of every item up front, one query per
+        # field and kind of value, so the items validate without queries
+        if isinstance(data, list):
+            for field in self.m2m_fields:
+                self.child.fields[field].resolver().load([
+                    value
+                    for item in data if isinstance(item, dict)
+                    and isinstance(item.get(field), list)
+                    for value in item[field]
+                    if isinstance(value, (int, str))
+                    and not isinstance(value, bool)
+                ])
+
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        save_new_related(validated_data, self.m2m_fields)
+        relations = [self._pop_relations(attrs) for attrs in validated_data]
+        recipes = super().create(validated_data)
+        self._add_relations(recipes, relations)
+
+        return recipes
+
+    def update(self, instances, validated_data):
+        save_new_related(validated_data, self.m2m_fields)
+        relations = [self._pop_relations(attrs) for attrs in validated_data]
+        recipes = super().update(instances, validated_data)
+
+        for field in self.m2m_fields:
+            replaced = [
+                recipe.id for recipe, related in zip(recipes, relations)
+                if field in related
+            ]
+            if replaced:
+                getattr(Recipe, field).through.objects \
+                    .filter(recipe_id__in=replaced) \
+                    .delete()
+        self._add_relations(recipes, relations)
+
+        return recipes
+
+    def _pop_relations(self, attrs):
+        return {
+            field: attrs.pop(field)
+            for field in self.m2m_fields
+            if field in attrs
+        }
+
+    def _add_relations(self, recipes, relations):
+        for field, related_column in self.m2m_fields.items():
+            through = getattr(Recipe, field).through
+            through.objects.bulk_create([
+                through(recipe_id=recipe.id, **{related_column: obj.id})
+                for recipe, related in zip(recipes, relations)
+                for obj in related.get(field, ())
+            ])
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -8,6 +256,7 @@ class TagSerializer(serializers.ModelSerializer):
         model = Tag
         fields = ('id', 'name',)
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -15,33 +264,96 @@ class IngredientSerializer(serializers.ModelSerializer):
         model = Ingredient
         fields = ('id', 'name',)
         read_only_fields = ('id',)
+        list_serializer_class = BulkListSerializer
+
+
+class SparseFieldsMixin:
+    """Serializer trimmed to the `fields` of its context, with the
+    relations named in the context's `expand` rendered as nested objects
+    rather than ids."""
+    expandable = {}
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
-class RecipeSerializer(serializers.ModelSerializer):
-    ingredients = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Ingredient.objects.all(),
-    )
+        for name in self.context.get('expand', ()):
+            if name in self.fields and name in self.expandable:
+                self.fields[name] = self.expandable[name]()
 
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Tag.objects.all(),
-    )
+
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable = {
+        'ingredients': lambda: IngredientSerializer(many=True, read_only=True),
+        'tags': lambda: TagSerializer(many=True, read_only=True),
+    }
+
+    ingredients = UserRelatedField(Ingredient)
+    tags = UserRelatedField(Tag)
 
     class Meta:
         model = Recipe
         fields = ('id', 'title', 'ingredients', 'tags',
                   'time_minutes', 'link', 'price')
         read_only_fields = ('id',)
+        list_serializer_class = RecipeBulkListSerializer
+
+    def create(self, validated_data):
+        save_new_related([validated_data], ('ingredients', 'tags'))
+
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        save_new_related([validated_data], ('ingredients', 'tags'))
+
+        return super().update(instance, validated_data)
+
+
+class RecipeSummarySerializer(SparseFieldsMixin,
+                              serializers.ModelSerializer):
+    """Renders a RecipeSummary exactly like RecipeSerializer does a recipe."""
+    id = serializers.IntegerField(source='recipe_id')
+    ingredients = serializers.SerializerMethodField()
+    tags = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RecipeSummary
+        fields = RecipeSerializer.Meta.fields
+        read_only_fields = fields
+
+    def get_ingredients(self, summary):
+        return self._related(summary.ingredients, 'ingredients')
+
+    def get_tags(self, summary):
+        return self._related(summary.tags, 'tags')
+
+    def _related(self, value, name):
+        items = json.loads(value)
+        if name in self.context.get('expand', ()):
+            return items
+
+        return [item['id'] for item in items]
 
 
 class RecipeDetailSerializer(RecipeSerializer):
+    # always expanded
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
 
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + (
+            'image', 'image_status', 'image_thumbnail', 'image_webp',
+        )
+        read_only_fields = fields
+
 
 class RecipeImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
-        fields = ('id', 'image',)
-        read_only_fields = ('id',)
+        fields = ('id', 'image', 'image_status', 'image_thumbnail',
+                  'image_webp',)
+        read_only_fields = ('id', 'image_status', 'image_thumbnail',
+                            'image_webp',)
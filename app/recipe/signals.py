@@ -0,0 +1,249 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, \
+    pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from core.models import Tag, Ingredient, Recipe
+from core.signals import bulk_changed
+from recipe import matching, stats, summary, sync
+from recipe.cache import bump_version, bump_version_on_commit
+from recipe.search import index_recipes
+
+THROUGH_COLUMNS = {
+    Tag: (Recipe.tags.through, 'tag_id'),
+    Ingredient: (Recipe.ingredients.through, 'ingredient_id'),
+}
+
+
+def linked_recipe_ids(model, ids):
+    through, column = THROUGH_COLUMNS[model]
+
+    return list(
+        through.objects
+        .filter(**{f'{column}__in': ids})
+        .values_list('recipe_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def bump_version_on_write(sender, instance, **kwargs):
+    bump_version_on_commit(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_version_on_relation_change(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        bump_version_on_commit(instance.user_id)
+
+
+@receiver(bulk_changed)
+def bump_version_on_bulk_write(sender, user_id, **kwargs):
+    bump_version_on_commit(user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def bump_version_on_new_user(sender, instance, created, **kwargs):
+    # user ids can be reused after a delete, never serve their old responses;
+    # nothing of a user can be read before it commits, so no need to wait
+    if created:
+        bump_version(instance.id)
+
+
+def reindex(recipe_ids):
+    index_recipes(recipe_ids)
+    summary.refresh(recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+def reindex_saved_recipe(sender, instance, update_fields=None, **kwargs):
+    summary.refresh([instance.id])
+    if update_fields is None or 'title' in update_fields:
+        index_recipes([instance.id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipes_relation_change(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    """Reindexes and sequences the recipes whose relations changed."""
+    if not reverse:
+        if not action.startswith('post_'):
+            return
+        recipe_ids = [instance.id]
+    elif action == 'pre_clear':
+        instance._cleared_recipe_ids = linked_recipe_ids(
+            type(instance), [instance.id],
+        )
+        return
+    elif action == 'post_clear':
+        recipe_ids = instance.__dict__.pop('_cleared_recipe_ids', [])
+    elif action in ('post_add', 'post_remove'):
+        recipe_ids = pk_set
+    else:
+        return
+
+    reindex(recipe_ids)
+    sync.touch(Recipe, instance.user_id, recipe_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def reindex_renamed_relation(sender, instance, created, **kwargs):
+    if not created:
+        reindex(linked_recipe_ids(sender, [instance.id]))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def recipes_relation_delete(sender, instance, signal, **kwargs):
+    """Reindexes and sequences the recipes that used a deleted tag or
+    ingredient, found before the delete removes their links."""
+    if signal is pre_delete:
+        instance._linked_recipe_ids = linked_recipe_ids(
+            sender, [instance.id],
+        )
+        return
+
+    recipe_ids = instance.__dict__.pop('_linked_recipe_ids', [])
+    reindex(recipe_ids)
+    sync.touch(Recipe, instance.user_id, recipe_ids)
+
+
+@receiver(bulk_changed)
+def reindex_bulk_write(sender, ids, deleted=False, **kwargs):
+    # deleted rows took their index rows and summaries with them
+    if deleted:
+        return
+
+    if sender is Recipe:
+        reindex(ids)
+    elif sender in THROUGH_COLUMNS:
+        reindex(linked_recipe_ids(sender, ids))
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_matrix_on_relation_change(sender, instance, action, reverse,
+                                         pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        matching.store.invalidate(instance.user_id, recipe_ids=[instance.id])
+    elif action == 'post_clear':
+        matching.store.invalidate(
+            instance.user_id, ingredient_ids=[instance.id],
+        )
+    else:
+        matching.store.invalidate(instance.user_id, recipe_ids=pk_set)
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_matrix_on_recipe_delete(sender, instance, **kwargs):
+    matching.store.invalidate(instance.user_id, recipe_ids=[instance.id])
+
+
+@receiver(post_delete, sender=Ingredient)
+def invalidate_matrix_on_ingredient_delete(sender, instance, **kwargs):
+    matching.store.invalidate(instance.user_id, ingredient_ids=[instance.id])
+
+
+@receiver(bulk_changed)
+def invalidate_matrix_on_bulk_write(sender, user_id, ids, **kwargs):
+    if sender is Recipe:
+        matching.store.invalidate(user_id, recipe_ids=ids)
+    elif sender is Ingredient:
+        matching.store.invalidate(user_id, ingredient_ids=ids)
+
+
+@receiver(post_save, sender=get_user_model())
+def reset_matrix_of_new_user(sender, instance, created, **kwargs):
+    if created:
+        matching.store.reset(instance.id)
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_stats_on_recipe_save(sender, instance, **kwargs):
+    stats.invalidate(instance.user_id, ('price', 'time_minutes'))
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_stats_on_recipe_delete(sender, instance, **kwargs):
+    stats.invalidate(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_tag_stats(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        stats.invalidate(instance.user_id, ('tags',))
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_ingredient_stats(sender, instance, action, **kwargs):
+    if action.startswith('post_'):
+        stats.invalidate(instance.user_id, ('ingredients',))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_stats_on_tag_write(sender, instance, **kwargs):
+    stats.invalidate(instance.user_id, ('tags',))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_stats_on_ingredient_write(sender, instance, **kwargs):
+    stats.invalidate(instance.user_id, ('ingredients',))
+
+
+@receiver(bulk_changed)
+def invalidate_stats_on_bulk_write(sender, user_id, **kwargs):
+    if sender is Tag:
+        stats.invalidate(user_id, ('tags',))
+    elif sender is Ingredient:
+        stats.invalidate(user_id, ('ingredients',))
+    else:
+        stats.invalidate(user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_stats_of_new_user(sender, instance, created, **kwargs):
+    if created:
+        stats.invalidate(instance.id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def sequence_saved(sender, instance, **kwargs):
+    sync.touch(sender, instance.user_id, [instance.id])
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def tombstone_on_delete(sender, instance, **kwargs):
+    sync.bury(sender, instance.user_id, [instance.id])
+
+
+@receiver(bulk_changed)
+def sequence_bulk_write(sender, user_id, ids, deleted=False, **kwargs):
+    if sender not in sync.COLLECTIONS:
+        return
+
+    if deleted:
+        sync.bury(sender, user_id, ids)
+    else:
+        sync.touch(sender, user_id, ids)
+
+
+@receiver(post_delete, sender=get_user_model())
+def forget_sync_state_of_deleted_user(sender, instance, **kwargs):
+    sync.forget(instance.id)
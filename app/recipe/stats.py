@@ -0,0 +1,111 @@
+import math
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Min, Q
+
+from core.models import Tag, Ingredient, Recipe
+from recipe.cache import bump_version_on_commit, get_version
+
+PERCENTILES = (25, 50, 75, 90)
+HISTOGRAM_EDGES = {
+    'price': (5, 10, 20, 50),
+    'time_minutes': (15, 30, 60, 120),
+}
+SECTIONS = ('tags', 'ingredients', 'price', 'time_minutes')
+
+
+def _scope(section):
+    return f'recipe-stats-{section}'
+
+
+def invalidate(user_id, sections=SECTIONS):
+    for section in sections:
+        bump_version_on_commit(user_id, _scope(section))
+
+
+def section(user_id, name):
+    """One statistics section, materialized in the cache until a write
+    bumps its version."""
+    version = get_version(user_id, _scope(name))
+    key = f'recipe:stats:{user_id}:{name}:{version}'
+    data = cache.get(key)
+    if data is None:
+        data = COMPUTE[name](user_id)
+        cache.set(key, data, settings.RECIPE_STATS_CACHE_TIMEOUT)
+
+    return data
+
+
+def _usage_counts(model, user_id):
+    return list(
+        model.objects
+        .filter(user_id=user_id)
+        .annotate(recipes=Count('recipe'))
+        .order_by('-recipes', 'name', 'id')
+        .values('id', 'name', 'recipes')
+    )
+
+
+def _distribution(field, user_id):
+    recipes = Recipe.objects.filter(user_id=user_id)
+    edges = HISTOGRAM_EDGES[field]
+    bounds = list(zip((None,) + edges, edges + (None,)))
+    buckets = {
+        f'bucket_{index}': Count('id', filter=Q(**{
+            f'{field}__{lookup}': value
+            for lookup, value in (('gte', low), ('lt', high))
+            if value is not None
+        }))
+        for index, (low, high) in enumerate(bounds)
+    }
+    summary = recipes.aggregate(
+        count=Count('id'),
+        min=Min(field),
+        max=Max(field),
+        avg=Avg(field),
+        **buckets
+    )
+
+    count = summary['count']
+    ordered = recipes.order_by(field).values_list(field, flat=True)
+    # nearest rank, each one an offset into the (user, field) index
+    percentiles = {
+        f'p{percentile}': _format(
+            ordered[math.ceil(percentile * count / 100) - 1], field,
+        ) if count else None
+        for percentile in PERCENTILES
+    }
+
+    return dict(
+        {
+            'count': count,
+            'min': _format(summary['min'], field),
+            'max': _format(summary['max'], field),
+            'avg': _format(summary['avg'], field),
+        },
+        **percentiles,
+        histogram=[
+            {'min': low, 'max': high, 'count': summary[f'bucket_{index}']}
+            for index, (low, high) in enumerate(bounds)
+        ],
+    )
+
+
+def _format(value, field):
+    # prices are rendered as strings, like everywhere else in the API
+    if value is None:
+        return None
+    elif field == 'price':
+        return str(Decimal(value).quantize(Decimal('.01'), ROUND_HALF_UP))
+
+    return round(value, 1)
+
+
+COMPUTE = {
+    'tags': lambda user_id: _usage_counts(Tag, user_id),
+    'ingredients': lambda user_id: _usage_counts(Ingredient, user_id),
+    'price': lambda user_id: _distribution('price', user_id),
+    'time_minutes': lambda user_id: _distribution('time_minutes', user_id),
+}
@@ -0,0 +1,120 @@
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from core.models import Recipe, RecipeSummary
+
+BATCH_SIZE = 500
+
+SUMMARY_FIELDS = ('user_id', 'title', 'time_minutes', 'price', 'link',
+                  'tags', 'ingredients')
+
+_state = threading.local()
+
+
+def build_summaries(recipe_ids):
+    """Unsaved RecipeSummary rows computed from the normalized tables."""
+    related = {}
+    for through, field in (
+            (Recipe.tags.through, 'tag'),
+            (Recipe.ingredients.through, 'ingredient'),
+    ):
+        related[field] = defaultdict(list)
+        rows = through.objects \
+            .filter(recipe_id__in=recipe_ids) \
+            .order_by('id') \
+            .values_list('recipe_id', f'{field}_id', f'{field}__name')
+        for recipe_id, pk, name in rows:
+            related[field][recipe_id].append({'id': pk, 'name': name})
+
+    recipes = Recipe.objects \
+        .filter(id__in=recipe_ids) \
+        .values_list('id', 'user_id', 'title', 'time_minutes', 'price',
+                     'link')
+
+    return [
+        RecipeSummary(
+            recipe_id=recipe_id,
+            user_id=user_id,
+            title=title,
+            time_minutes=time_minutes,
+            price=price,
+            link=link,
+            tags=json.dumps(related['tag'][recipe_id]),
+            ingredients=json.dumps(related['ingredient'][recipe_id]),
+        )
+        for recipe_id, user_id, title, time_minutes, price, link in recipes
+    ]
+
+
+def rebuild(recipe_ids):
+    recipe_ids = sorted(set(recipe_ids))
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        chunk = recipe_ids[start:start + BATCH_SIZE]
+        with transaction.atomic():
+            summaries = build_summaries(chunk)
+            RecipeSummary.objects.filter(recipe_id__in=chunk).delete()
+            RecipeSummary.objects.bulk_create(summaries)
+
+
+def refresh(recipe_ids):
+    if not settings.RECIPE_SUMMARIES:
+        return
+
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        pending.update(recipe_ids)
+    else:
+        rebuild(recipe_ids)
+
+
+@contextmanager
+def deferred():
+    """Collects refreshes made in the block and applies them once at its end.
+
+    Meant to run inside the transaction of the write, so the summaries are
+    committed or rolled back together with the recipes.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+
+    _state.pending = set()
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+
+    if settings.RECIPE_SUMMARIES:
+        rebuild(pending)
+
+
+def verify(recipe_ids):
+    """Ids of recipes whose summary is missing or stale."""
+    recipe_ids = sorted(set(recipe_ids))
+    mismatched = []
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        chunk = recipe_ids[start:start + BATCH_SIZE]
+        expected = {
+            summary.recipe_id: _values(summary)
+            for summary in build_summaries(chunk)
+        }
+        stored = {
+            summary.recipe_id: _values(summary)
+            for summary in RecipeSummary.objects.filter(recipe_id__in=chunk)
+        }
+        mismatched.extend(
+            recipe_id for recipe_id in chunk
+            if expected.get(recipe_id) != stored.get(recipe_id)
+        )
+
+    return mismatched
+
+
+def _values(summary):
+    return tuple(getattr(summary, field) for field in SUMMARY_FIELDS)
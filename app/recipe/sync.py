@@ -0,0 +1,137 @@
+from django.db import transaction
+from django.db.models import F, Prefetch
+from django.utils import timezone
+
+from core.models import Tag, Ingredient, Recipe, SyncState, Tombstone
+
+COLLECTIONS = {Tag: 'tags', Ingredient: 'ingredients', Recipe: 'recipes'}
+
+
+class UnknownCursor(Exception):
+    pass
+
+
+def lock(user_id):
+    """Locks the user's SyncState row until the transaction ends.
+
+    Stamping a write locks it after the rows written, but a tag or
+    ingredient delete locks the recipes using it only after it. Write
+    transactions take it before touching any row, so they all lock in the
+    same order.
+    """
+    SyncState.objects.select_for_update().get_or_create(user_id=user_id)
+
+
+def next_sequence(user_id):
+    """Hands out the user's next change sequence.
+
+    Must run in the transaction of the write: the UPDATE keeps the user's
+    SyncState row locked until it ends, so writes of one user commit in
+    sequence order and readers never see a sequence before a lower one.
+    """
+    while not SyncState.objects.filter(user_id=user_id) \
+            .update(sequence=F('sequence') + 1):
+        SyncState.objects.get_or_create(user_id=user_id)
+
+    return SyncState.objects \
+        .filter(user_id=user_id) \
+        .values_list('sequence', flat=True) \
+        .get()
+
+
+def touch(model, user_id, ids):
+    ids = list(ids)
+    if not ids:
+        return
+
+    with transaction.atomic(savepoint=False):
+        model.objects.filter(id__in=ids).update(
+            sequence=next_sequence(user_id),
+            updated_at=timezone.now(),
+        )
+
+
+def bury(model, user_id, ids):
+    with transaction.atomic(savepoint=False):
+        sequence = next_sequence(user_id)
+        Tombstone.objects.bulk_create([
+            Tombstone(
+                user_id=user_id,
+                collection=COLLECTIONS[model],
+                object_id=pk,
+                sequence=sequence,
+            )
+            for pk in ids
+        ])
+
+
+def forget(user_id):
+    # rows written by the deletes that cascaded from the user itself
+    Tombstone.objects.filter(user_id=user_id).delete()
+    SyncState.objects.filter(user_id=user_id).delete()
+
+
+def changes(user_id, since, limit):
+    """Tags, ingredients and recipes changed after the `since` sequence, ids
+    deleted after it, and the cursor to continue from.
+
+    Stops after about `limit` changes, but never between rows of one write,
+    as those share their sequence. Deletions are left out when syncing from
+    the start.
+    """
+    cursor = SyncState.objects \
+        .filter(user_id=user_id) \
+        .values_list('sequence', flat=True) \
+        .first() or 0
+    if since > cursor:
+        raise UnknownCursor()
+
+    sources = {
+        name: model.objects.filter(user_id=user_id)
+        for model, name in COLLECTIONS.items()
+    }
+    if since:
+        sources['deleted'] = Tombstone.objects.filter(user_id=user_id)
+
+    # later writes get higher sequences, leaving them for the next call
+    # keeps every query of this one on the same set of changes
+    sources = {
+        name: queryset.filter(sequence__gt=since, sequence__lte=cursor)
+        for name, queryset in sources.items()
+    }
+    sequences = sorted(
+        sequence
+        for queryset in sources.values()
+        for sequence in queryset
+        .order_by('sequence')
+        .values_list('sequence', flat=True)[:limit + 1]
+    )
+    more = len(sequences) > limit
+    if more:
+        cursor = sequences[limit - 1]
+        sources = {
+            name: queryset.filter(sequence__lte=cursor)
+            for name, queryset in sources.items()
+        }
+
+    deleted = {name: [] for name in COLLECTIONS.values()}
+    if 'deleted' in sources:
+        for collection, pk in sources.pop('deleted') \
+                .order_by('sequence') \
+                .values_list('collection', 'object_id'):
+            deleted[collection].append(pk)
+
+    sources['recipes'] = sources['recipes'].prefetch_related(
+        Prefetch('tags', Tag.objects.only('id')),
+        Prefetch('ingredients', Ingredient.objects.only('id')),
+    )
+
+    return dict(
+        {
+            name: queryset.order_by('sequence', 'id')
+            for name, queryset in sources.items()
+        },
+        deleted=deleted,
+        cursor=cursor,
+        more=more,
+    )
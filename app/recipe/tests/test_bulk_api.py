@@ -0,0 +1,227 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeSearchTerm, Tag, Ingredient, \
+    Tombstone
+
+RECIPES_BULK_URL = reverse("recipe:recipe-bulk")
+TAGS_BULK_URL = reverse("recipe:tag-bulk")
+INGREDIENTS_BULK_URL = reverse("recipe:ingredient-bulk")
+
+
+def sample_recipe(user, **kwargs):
+    defaults = {
+        'title': 'title',
+        'time_minutes': 10,
+        'price': 5.00,
+    }
+    defaults.update(kwargs)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class BulkApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="bulk@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_tags(self):
+        payload = [{'name': 'vegan'}, {'name': 'dessert'}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([tag['name'] for tag in res.data],
+                         ['vegan', 'dessert'])
+        self.assertEqual(
+            Tag.objects.filter(user=self.user).count(), 2,
+        )
+        self.assertTrue(all(tag['id'] for tag in res.data))
+
+    def test_bulk_create_reports_errors_per_item(self):
+        payload = [{'name': 'fine'}, {'name': ''}]
+
+        res = self.client.post(INGREDIENTS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_bulk_create_recipes_with_relations(self):
+        tag = Tag.objects.create(user=self.user, name='quick')
+        ingredient = Ingredient.objects.create(user=self.user, name='egg')
+        payload = [
+            {
+                'title': f'recipe {index}',
+                'time_minutes': 5,
+                'price': '2.50',
+                'tags': [tag.id],
+                'ingredients': [ingredient.id],
+            }
+            for index in range(20)
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 20)
+        for item, recipe in zip(res.data, payload):
+            self.assertEqual(item['title'], recipe['title'])
+            self.assertEqual(item['tags'], [tag.id])
+            self.assertEqual(item['ingredients'], [ingredient.id])
+        self.assertEqual(tag.recipe_set.count(), 20)
+        self.assertEqual(ingredient.recipe_set.count(), 20)
+
+    def test_bulk_create_recipes_query_count_is_constant(self):
+        tag = Tag.objects.create(user=self.user, name='quick')
+
+        def create(count):
+            payload = [
+                {
+                    'title': f'recipe {index}',
+                    'time_minutes': 5,
+                    'price': '2.50',
+                    'tags': [tag.id],
+                    'ingredients': [],
+                }
+                for index in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(
+                    RECIPES_BULK_URL, payload, format='json',
+                )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+            return len(queries)
+
+        # the tags of all items are looked up at once, a constant number of
+        # queries for the writes, their sync sequence and the response
+        self.assertEqual(create(20), create(40))
+
+    def test_bulk_update_recipes_query_count_is_constant(self):
+        def update(count):
+            recipes = [sample_recipe(self.user) for _ in range(count)]
+            payload = [
+                {'id': recipe.id, 'title': f'new {index}', 'price': '1.50'}
+                for index, recipe in enumerate(recipes)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.patch(
+                    RECIPES_BULK_URL, payload, format='json',
+                )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            return len(queries)
+
+        self.assertEqual(update(10), update(20))
+
+    def test_bulk_delete_tags_query_count_is_constant(self):
+        recipe = sample_recipe(self.user)
+
+        def delete(count):
+            tags = [
+                Tag.objects.create(user=self.user, name=f'tag {index}')
+                for index in range(count)
+            ]
+            recipe.tags.add(*tags)
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.delete(
+                    TAGS_BULK_URL, [tag.id for tag in tags], format='json',
+                )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            return len(queries)
+
+        self.assertEqual(delete(10), delete(20))
+        self.assertFalse(recipe.tags.exists())
+
+    def test_bulk_update_recipes(self):
+        tag = Tag.objects.create(user=self.user, name='quick')
+        recipe1 = sample_recipe(self.user, title='one')
+        recipe2 = sample_recipe(self.user, title='two')
+        recipe2.tags.add(tag)
+        payload = [
+            {'id': recipe1.id, 'price': '9.99', 'tags': [tag.id]},
+            {'id': recipe2.id, 'title': 'changed', 'tags': []},
+        ]
+
+        res = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(recipe1.price, Decimal('9.99'))
+        self.assertEqual(recipe1.title, 'one')
+        self.assertEqual(list(recipe1.tags.all()), [tag])
+        self.assertEqual(recipe2.title, 'changed')
+        self.assertFalse(recipe2.tags.exists())
+
+    def test_bulk_update_other_users_recipe_not_found(self):
+        other = get_user_model().objects.create_user(
+            email="other@test.pl",
+            password="passwordpassword",
+        )
+        mine = sample_recipe(self.user)
+        theirs = sample_recipe(other, title='theirs')
+        payload = [
+            {'id': mine.id, 'title': 'new'},
+            {'id': theirs.id, 'title': 'stolen'},
+        ]
+
+        res = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        theirs.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('id', res.data[1])
+        self.assertEqual(theirs.title, 'theirs')
+
+    def test_bulk_delete_tags_updates_linked_recipes(self):
+        tag = Tag.objects.create(user=self.user, name='spicy')
+        recipe = sample_recipe(self.user, title='curry')
+        recipe.tags.add(tag)
+        sequence = Recipe.objects.get(id=recipe.id).sequence
+
+        res = self.client.delete(TAGS_BULK_URL, [tag.id], format='json')
+
+        self.assertEqual(res.data, [{'id': tag.id, 'deleted': True}])
+        self.assertGreater(
+            Recipe.objects.get(id=recipe.id).sequence, sequence,
+        )
+        self.assertFalse(RecipeSearchTerm.objects.filter(
+            recipe=recipe, term='spicy',
+        ).exists())
+        self.assertTrue(Tombstone.objects.filter(
+            collection='tags', object_id=tag.id,
+        ).exists())
+
+    def test_bulk_delete_recipes(self):
+        recipe1 = sample_recipe(self.user)
+        recipe2 = sample_recipe(self.user)
+        missing_id = recipe2.id + 100
+
+        res = self.client.delete(
+            RECIPES_BULK_URL,
+            [recipe1.id, missing_id],
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'id': recipe1.id, 'deleted': True},
+            {'id': missing_id, 'deleted': False},
+        ])
+        self.assertFalse(Recipe.objects.filter(id=recipe1.id).exists())
+        self.assertTrue(Recipe.objects.filter(id=recipe2.id).exists())
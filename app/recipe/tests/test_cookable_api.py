@@ -0,0 +1,175 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Ingredient
+from recipe import matching
+from recipe.cache import bump_version, get_version
+from recipe.matching import IngredientMatrix
+
+COOKABLE_URL = reverse("recipe:recipe-cookable")
+
+
+def sample_recipe(user, ingredients=(), **kwargs):
+    defaults = {
+        'title': 'title',
+        'time_minutes': 10,
+        'price': 5.00,
+    }
+    defaults.update(kwargs)
+    recipe = Recipe.objects.create(user=user, **defaults)
+    recipe.ingredients.add(*ingredients)
+
+    return recipe
+
+
+class IngredientMatrixTests(TestCase):
+    def test_rank_orders_by_missing_then_matched(self):
+        matrix = IngredientMatrix(version=None)
+        matrix.apply([], [
+            (1, 10), (1, 11), (1, 12),
+            (2, 10),
+            (3, 10), (3, 13),
+            (4, 13),
+        ])
+
+        ranked = matrix.rank([10, 11], limit=10)
+
+        self.assertEqual([match.recipe_id for match in ranked], [2, 1, 3, 4])
+        self.assertEqual(ranked[1].missing, [12])
+        self.assertEqual(ranked[1].total, 3)
+
+    def test_apply_replaces_rows_and_grows(self):
+        matrix = IngredientMatrix(version=None)
+        matrix.apply([], [(1, 10)])
+
+        matrix.apply([1], [(1, pk) for pk in range(100, 120)] + [(2, 10)])
+        ranked = matrix.rank([10], limit=10)
+
+        self.assertEqual([match.recipe_id for match in ranked], [2, 1])
+        self.assertEqual(ranked[1].missing, list(range(100, 120)))
+
+    def test_recipes_using(self):
+        matrix = IngredientMatrix(version=None)
+        matrix.apply([], [(1, 10), (2, 11), (3, 10)])
+
+        self.assertEqual(matrix.recipes_using([10]), [1, 3])
+
+
+class CookableApiTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="cook@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.rice, self.beans, self.salt = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('rice', 'beans', 'salt')
+        ]
+
+    def cookable(self, ingredients, **params):
+        res = self.client.get(COOKABLE_URL, dict(
+            ingredients=','.join(str(item.id) for item in ingredients),
+            **params
+        ))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res.data
+
+    def test_ranks_by_coverage(self):
+        partial = sample_recipe(self.user, [self.rice, self.beans, self.salt])
+        complete = sample_recipe(self.user, [self.rice])
+        sample_recipe(self.user)
+
+        data = self.cookable([self.rice, self.beans])
+
+        self.assertEqual(
+            [item['id'] for item in data], [complete.id, partial.id],
+        )
+        self.assertEqual(data[0]['missing_ingredients'], [])
+        self.assertEqual(data[1]['missing_ingredients'], [self.salt.id])
+
+    def test_limit(self):
+        for _ in range(3):
+            sample_recipe(self.user, [self.rice])
+
+        self.assertEqual(len(self.cookable([self.rice], limit=2)), 2)
+
+    def test_other_users_recipes_are_not_returned(self):
+        other = get_user_model().objects.create_user(
+            email="other@test.pl",
+            password="passwordpassword",
+        )
+        onion = Ingredient.objects.create(user=other, name='onion')
+        sample_recipe(other, [onion])
+
+        self.assertEqual(self.cookable([onion]), [])
+
+    def test_relation_change_patches_matrix(self):
+        recipe = sample_recipe(self.user, [self.rice])
+        self.cookable([self.rice])
+
+        recipe.ingredients.add(self.salt)
+        with self.assertNumQueries(4):
+            # reload of the dirty row, recipes and their relations
+            data = self.cookable([self.rice])
+
+        self.assertEqual(data[0]['missing_ingredients'], [self.salt.id])
+
+    def test_matrix_is_invalidated_on_commit(self):
+        recipe = sample_recipe(self.user, [self.rice])
+        self.cookable([self.rice])
+        version = get_version(self.user.id, matching.VERSION_SCOPE)
+
+        with transaction.atomic():
+            recipe.ingredients.add(self.salt)
+            self.assertEqual(
+                get_version(self.user.id, matching.VERSION_SCOPE), version,
+            )
+
+        self.assertEqual(
+            get_version(self.user.id, matching.VERSION_SCOPE), version + 1,
+        )
+        with self.assertNumQueries(4):
+            data = self.cookable([self.rice])
+        self.assertEqual(data[0]['missing_ingredients'], [self.salt.id])
+
+    def test_deleted_ingredient_is_no_longer_missing(self):
+        sample_recipe(self.user, [self.rice, self.salt])
+        self.cookable([self.rice])
+
+        self.salt.delete()
+        data = self.cookable([self.rice])
+
+        self.assertEqual(data[0]['missing_ingredients'], [])
+
+    def test_deleted_recipe_is_dropped(self):
+        recipe = sample_recipe(self.user, [self.rice])
+        self.cookable([self.rice])
+
+        recipe.delete()
+
+        self.assertEqual(self.cookable([self.rice]), [])
+
+    def test_change_from_other_process_reloads_matrix(self):
+        sample_recipe(self.user, [self.rice])
+        self.cookable([self.rice])
+
+        # what a write handled by another process leaves behind
+        Recipe.ingredients.through.objects.all().delete()
+        bump_version(self.user.id)
+        bump_version(self.user.id, matching.VERSION_SCOPE)
+
+        self.assertEqual(self.cookable([self.rice]), [])
+
+    def test_invalid_limit(self):
+        res = self.client.get(COOKABLE_URL, {'limit': 'many'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
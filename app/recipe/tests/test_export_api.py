@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+EXPORT_URL = reverse("recipe:recipe-export")
+
+
+def streamed_content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class RecipeExportApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="export@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='dinner')
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name='rice'),
+            Ingredient.objects.create(user=self.user, name='beans'),
+        ]
+        self.recipes = []
+        for index in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'recipe {index}',
+                time_minutes=index,
+                price='1.50',
+            )
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(*self.ingredients)
+            self.recipes.append(recipe)
+
+    def test_export_jsonl(self):
+        res = self.client.get(EXPORT_URL)
+        lines = streamed_content(res).splitlines()
+        first = json.loads(lines[0])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(first['id'], self.recipes[0].id)
+        self.assertEqual(first['price'], '1.50')
+        self.assertEqual(first['tags'], [
+            {'id': self.tag.id, 'name': 'dinner'},
+        ])
+        self.assertEqual(
+            [item['name'] for item in first['ingredients']],
+            ['rice', 'beans'],
+        )
+
+    def test_export_csv(self):
+        res = self.client.get(EXPORT_URL, {'export_format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(streamed_content(res))))
+
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1]['title'], 'recipe 1')
+        self.assertEqual(rows[1]['ingredients'], 'rice;beans')
+        self.assertEqual(rows[1]['tags'], 'dinner')
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_export_queries_per_chunk(self):
+        res = self.client.get(EXPORT_URL)
+
+        # per chunk of 2 recipes: tags + ingredients, plus the recipe query
+        with self.assertNumQueries(7):
+            lines = streamed_content(res).splitlines()
+
+        self.assertEqual(len(lines), 5)
+
+    def test_export_only_own_recipes(self):
+        other = get_user_model().objects.create_user(
+            email="other@test.pl",
+            password="passwordpassword",
+        )
+        Recipe.objects.create(
+            user=other, title='theirs', time_minutes=1, price=1,
+        )
+
+        lines = streamed_content(self.client.get(EXPORT_URL)).splitlines()
+
+        self.assertNotIn('theirs', ''.join(lines))
+
+    def test_export_unknown_format(self):
+        res = self.client.get(EXPORT_URL, {'export_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,236 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from recipe import images
+from recipe.images import FileQueue, process_recipe_image
+
+# TIFF block holding a single EXIF orientation tag set to 6 (rotate 90 CW)
+EXIF_ROTATED = (
+    b'Exif\x00\x00II*\x00\x08\x00\x00\x00\x01\x00'
+    b'\x12\x01\x03\x00\x01\x00\x00\x00\x06\x00\x00\x00\x00\x00\x00\x00'
+)
+
+
+def image_upload_url(recipe_id):
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+class RecipeImageProcessingTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            IMAGE_PROCESSING_EAGER=True,
+        )
+        self.settings_override.enable()
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="images@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='photo',
+            time_minutes=10,
+            price=5.00,
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def upload(self, image, **save_options):
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            image.save(ntf, format='JPEG', **save_options)
+            ntf.seek(0)
+
+            return self.client.post(
+                image_upload_url(self.recipe.id),
+                {'image': ntf},
+                format='multipart',
+            )
+
+    def test_upload_generates_variants(self):
+        res = self.upload(Image.new('RGB', (1000, 600)))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_READY)
+        self.assertEqual(
+            Image.open(self.recipe.image_thumbnail.path).size, (320, 192),
+        )
+        webp = Image.open(self.recipe.image_webp.path)
+        self.assertEqual(webp.format, 'WEBP')
+        self.assertEqual(webp.size, (1000, 600))
+
+    def test_upload_strips_exif_and_applies_orientation(self):
+        res = self.upload(Image.new('RGB', (40, 20)), exif=EXIF_ROTATED)
+
+        self.recipe.refresh_from_db()
+        # written under a new name, the uploaded file is gone
+        self.assertFalse(res.data['image'].endswith(self.recipe.image.name))
+        original = Image.open(self.recipe.image.path)
+        self.assertNotIn('exif', original.info)
+        self.assertEqual(original.size, (20, 40))
+
+    def test_variant_urls_in_detail(self):
+        self.upload(Image.new('RGB', (10, 10)))
+
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[self.recipe.id])
+        )
+
+        self.assertEqual(res.data['image_status'], Recipe.IMAGE_READY)
+        self.assertTrue(res.data['image_thumbnail'].endswith('-thumb.jpg'))
+        self.assertTrue(res.data['image_webp'].endswith('.webp'))
+
+    def test_unreadable_image_marks_failure(self):
+        self.upload(Image.new('RGB', (10, 10)))
+        self.recipe.refresh_from_db()
+        with open(self.recipe.image.path, 'wb') as broken:
+            broken.write(b'not an image')
+
+        with self.assertLogs('recipe.images', 'ERROR'):
+            process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+
+    def test_failure_keeps_the_original(self):
+        self.upload(Image.new('RGB', (10, 10)))
+        self.recipe.refresh_from_db()
+        original = self.recipe.image.name
+
+        with mock.patch('recipe.images._encode', side_effect=OSError), \
+                self.assertLogs('recipe.images', 'ERROR'):
+            process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+        self.assertEqual(self.recipe.image.name, original)
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+
+    def test_failed_variant_removes_written_files(self):
+        self.upload(Image.new('RGB', (10, 10)))
+        self.recipe.refresh_from_db()
+        original = self.recipe.image.name
+        files = set(os.listdir(os.path.dirname(self.recipe.image.path)))
+        encode = images._encode
+
+        def fail_on_webp(image, image_format, **options):
+            if image_format == 'WEBP':
+                raise OSError('encoder missing')
+            return encode(image, image_format, **options)
+
+        with mock.patch('recipe.images._encode', side_effect=fail_on_webp), \
+                self.assertLogs('recipe.images', 'ERROR'):
+            process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_FAILED)
+        self.assertEqual(self.recipe.image.name, original)
+        self.assertEqual(
+            set(os.listdir(os.path.dirname(self.recipe.image.path))), files,
+        )
+
+    def test_original_is_replaced_once_recorded(self):
+        self.upload(Image.new('RGB', (10, 10)))
+        self.recipe.refresh_from_db()
+        original = self.recipe.image.path
+
+        process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertFalse(os.path.exists(original))
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+
+    def test_job_yields_to_a_newer_upload(self):
+        self.upload(Image.new('RGB', (10, 10)))
+        self.recipe.refresh_from_db()
+        directory = os.path.dirname(self.recipe.image.path)
+        files = set(os.listdir(directory))
+        write_variants = images._write_variants
+
+        def replace_meanwhile(recipe):
+            fields = write_variants(recipe)
+            Recipe.objects.filter(id=recipe.id).update(
+                image='newer.jpg', image_status=Recipe.IMAGE_PENDING,
+            )
+            return fields
+
+        with mock.patch('recipe.images._write_variants',
+                        side_effect=replace_meanwhile):
+            process_recipe_image(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, 'newer.jpg')
+        self.assertEqual(self.recipe.image_status, Recipe.IMAGE_PENDING)
+        # the variants it wrote are gone, the image it started from is left
+        # to the newer upload
+        self.assertEqual(set(os.listdir(directory)), files)
+
+    def test_upload_deletes_replaced_files_on_commit(self):
+        self.upload(Image.new('RGB', (10, 10)))
+        self.recipe.refresh_from_db()
+        replaced = [
+            self.recipe.image.path,
+            self.recipe.image_thumbnail.path,
+            self.recipe.image_webp.path,
+        ]
+
+        with mock.patch.object(images.transaction, 'on_commit') as on_commit:
+            self.upload(Image.new('RGB', (10, 10)))
+
+            self.assertTrue(all(os.path.exists(path) for path in replaced))
+            for call in on_commit.call_args_list:
+                call[0][0]()
+
+        self.assertFalse(any(os.path.exists(path) for path in replaced))
+        self.recipe.refresh_from_db()
+        self.assertTrue(os.path.exists(self.recipe.image_webp.path))
+
+
+class FileQueueTests(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.queue = FileQueue(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_job_is_claimed_once(self):
+        self.queue.put(7)
+
+        self.assertEqual(self.queue.pending(), [7])
+        self.assertTrue(self.queue.claim(7))
+        self.assertFalse(self.queue.claim(7))
+        self.assertEqual(self.queue.pending(), [])
+
+    def test_unfinished_jobs_are_requeued(self):
+        self.queue.put(3)
+        self.queue.claim(3)
+
+        self.queue.requeue_unfinished()
+
+        self.assertEqual(self.queue.pending(), [3])
+
+    def test_done_removes_job(self):
+        self.queue.put(5)
+        self.queue.claim(5)
+
+        self.queue.done(5)
+
+        self.assertEqual(self.queue.pending(), [])
+        self.assertEqual(self.queue.pending('working'), [])
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Recipe, Tag, Ingredient, ImportCheckpoint
+from recipe.importer import RecipeImporter, read_checkpoint
+
+
+class ImportRecipesCommandTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="import@test.pl",
+            password="passwordpassword",
+        )
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as stream:
+            stream.write(content)
+
+        return path
+
+    def write_jsonl(self, records):
+        return self.write(
+            'recipes.jsonl',
+            ''.join(json.dumps(record) + '\n' for record in records),
+        )
+
+    def import_recipes(self, path, *args):
+        out = StringIO()
+        call_command(
+            'import_recipes', path, '--user', self.user.email, *args,
+            stdout=out,
+        )
+
+        return out.getvalue()
+
+    def test_import_jsonl_resolves_names(self):
+        existing = Tag.objects.create(user=self.user, name='vegan')
+        path = self.write_jsonl([
+            {'title': 'soup', 'time_minutes': 20, 'price': '3.5',
+             'tags': ['vegan', 'dinner'], 'ingredients': ['leek']},
+            {'title': 'salad', 'time_minutes': 5, 'price': 2,
+             'tags': [{'name': 'vegan'}], 'ingredients': ['leek', 'leek']},
+        ])
+
+        output = self.import_recipes(path, '--batch-size=1')
+
+        soup = Recipe.objects.get(title='soup')
+        salad = Recipe.objects.get(title='salad')
+        self.assertIn('Imported 2 recipes', output)
+        self.assertEqual(soup.price, Decimal('3.50'))
+        self.assertEqual(
+            sorted(tag.name for tag in soup.tags.all()), ['dinner', 'vegan'],
+        )
+        self.assertIn(existing, salad.tags.all())
+        self.assertEqual(Tag.objects.filter(name='vegan').count(), 1)
+        self.assertEqual(Ingredient.objects.filter(name='leek').count(), 1)
+        self.assertEqual(salad.ingredients.count(), 1)
+
+    def test_import_csv(self):
+        path = self.write(
+            'recipes.csv',
+            'title,time_minutes,price,link,ingredients,tags\n'
+            'stew,90,12.00,,beef;carrot,winter\n',
+        )
+
+        self.import_recipes(path)
+
+        stew = Recipe.objects.get(user=self.user)
+        self.assertEqual(stew.title, 'stew')
+        self.assertEqual(stew.ingredients.count(), 2)
+        self.assertEqual(stew.tags.get().name, 'winter')
+
+    def test_invalid_row_keeps_committed_batches(self):
+        path = self.write_jsonl([
+            {'title': 'first', 'time_minutes': 1, 'price': 1},
+            {'title': 'second', 'time_minutes': 'soon', 'price': 1},
+        ])
+
+        with self.assertRaisesMessage(CommandError, 'Row 2'):
+            self.import_recipes(path, '--batch-size=1')
+
+        self.assertEqual(
+            list(Recipe.objects.values_list('title', flat=True)), ['first'],
+        )
+        self.assertEqual(read_checkpoint(self.user, path), 1)
+
+    def test_resume_from_checkpoint(self):
+        path = self.write_jsonl([
+            {'title': f'recipe {index}', 'time_minutes': 1, 'price': 1}
+            for index in range(5)
+        ])
+        ImportCheckpoint.objects.create(user=self.user, name=path, offset=3)
+
+        self.import_recipes(path, '--resume', '--batch-size=2')
+
+        self.assertEqual(
+            list(Recipe.objects.order_by('id')
+                 .values_list('title', flat=True)),
+            ['recipe 3', 'recipe 4'],
+        )
+
+    def test_checkpoint_commits_with_its_batch(self):
+        importer = RecipeImporter(self.user, batch_size=2)
+        batches = importer.import_records(
+            [
+                {'title': f'recipe {index}', 'time_minutes': 1, 'price': 1}
+                for index in range(5)
+            ],
+            checkpoint='stream',
+        )
+
+        self.assertEqual(next(batches), 2)
+        # stopping right after the commit loses no offset
+        self.assertEqual(read_checkpoint(self.user, 'stream'), 2)
+        self.assertEqual(Recipe.objects.count(), 2)
+
+    def test_unknown_user(self):
+        path = self.write_jsonl([])
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', path, '--user', 'no@body.pl')
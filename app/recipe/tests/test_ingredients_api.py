@@ -4,7 +4,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Ingredient
+from core.models import Ingredient, Recipe
 from recipe.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse("recipe:ingredient-list")
@@ -42,7 +42,7 @@ class PrivateRecipesAPiTests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(ingredients_serialized.data, res.data)
+        self.assertEqual(ingredients_serialized.data, res.data['results'])
 
     def test_retrieve_only_user_created_ingredients(self):
         user2 = get_user_model().objects.create_user(
@@ -68,7 +68,8 @@ class PrivateRecipesAPiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertFalse(should_not_exist)
-        self.assertEqual(res.data[0]['name'], mine_ingredient1.name)
+        self.assertEqual(res.data['results'][0]['name'],
+                         mine_ingredient1.name)
 
     def test_add_ingredient_successful(self):
         payload = {"name": "test1234", }
@@ -84,3 +85,21 @@ class PrivateRecipesAPiTests(TestCase):
         res = self.client.post(INGREDIENTS_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_retrieve_ingredients_assigned_to_recipes(self):
+        ingredient1 = Ingredient.objects.create(name="apple", user=self.user)
+        ingredient2 = Ingredient.objects.create(name="turkey", user=self.user)
+        recipe = Recipe.objects.create(
+            title="crumble",
+            time_minutes=5,
+            price=10.00,
+            user=self.user,
+        )
+        recipe.ingredients.add(ingredient1)
+
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+        names = [ingredient['name'] for ingredient in res.data['results']]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(names, [ingredient1.name])
+        self.assertNotIn(ingredient2.name, names)
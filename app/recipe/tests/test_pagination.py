@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="pages@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_recipes_are_paged_by_id(self):
+        recipes = [
+            Recipe.objects.create(
+                user=self.user,
+                title=f'recipe {index}',
+                time_minutes=10,
+                price=5.00,
+            )
+            for index in range(5)
+        ]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+        first_page = [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(res.data['previous'])
+        self.assertEqual(first_page, [recipes[0].id, recipes[1].id])
+
+        seen = list(first_page)
+        next_url = res.data['next']
+        while next_url:
+            res = self.client.get(next_url)
+            seen.extend(recipe['id'] for recipe in res.data['results'])
+            next_url = res.data['next']
+
+        self.assertEqual(seen, [recipe.id for recipe in recipes])
+
+    def test_tags_are_paged_by_name_descending(self):
+        for name in ('apple', 'banana', 'cherry'):
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        next_res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data['results']],
+            ['cherry', 'banana'],
+        )
+        self.assertEqual(
+            [tag['name'] for tag in next_res.data['results']],
+            ['apple'],
+        )
+        self.assertIsNone(next_res.data['next'])
+
+    def test_page_size_is_capped(self):
+        Tag.objects.create(user=self.user, name='only')
+
+        res = self.client.get(TAGS_URL, {'page_size': 100000})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
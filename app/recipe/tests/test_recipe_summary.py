@@ -0,0 +1,142 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeSummary, Tag, Ingredient
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def detail_url_generator(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def sample_recipe(user, **kwargs):
+    defaults = {
+        'title': 'title',
+        'time_minutes': 10,
+        'price': 5.00,
+    }
+    defaults.update(kwargs)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+@override_settings(RECIPE_SUMMARIES=True)
+class RecipeSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="summary@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='tofu',
+        )
+
+    def test_list_matches_normalized_list(self):
+        for index in range(3):
+            recipe = sample_recipe(self.user, title=f'recipe {index}')
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(self.ingredient)
+
+        with self.assertNumQueries(1):
+            summarized = self.client.get(RECIPES_URL)
+        cache.clear()
+        with self.settings(RECIPE_SUMMARIES=False):
+            normalized = self.client.get(RECIPES_URL)
+
+        self.assertEqual(summarized.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            summarized.data['results'], normalized.data['results'],
+        )
+
+    def test_create_and_update_through_api(self):
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Tofu bowl',
+            'time_minutes': 15,
+            'price': '7.00',
+            'tags': [self.tag.id],
+            'ingredients': [self.ingredient.id],
+        })
+        recipe_id = res.data['id']
+        self.client.patch(detail_url_generator(recipe_id), {
+            'title': 'Spicy tofu bowl',
+            'tags': [],
+        }, format='json')
+
+        stored = RecipeSummary.objects.get(recipe_id=recipe_id)
+
+        self.assertEqual(stored.title, 'Spicy tofu bowl')
+        self.assertEqual(json.loads(stored.tags), [])
+        self.assertEqual(json.loads(stored.ingredients), [
+            {'id': self.ingredient.id, 'name': 'tofu'},
+        ])
+
+    def test_renamed_and_deleted_relations(self):
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.tag)
+        recipe.ingredients.add(self.ingredient)
+
+        self.tag.name = 'vegetarian'
+        self.tag.save()
+        self.ingredient.delete()
+        stored = RecipeSummary.objects.get(recipe=recipe)
+
+        self.assertEqual(json.loads(stored.tags), [
+            {'id': self.tag.id, 'name': 'vegetarian'},
+        ])
+        self.assertEqual(json.loads(stored.ingredients), [])
+
+    def test_filtered_list_uses_normalized_tables(self):
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(self.tag)
+        sample_recipe(self.user)
+        RecipeSummary.objects.all().delete()
+
+        res = self.client.get(RECIPES_URL, {'tags': self.tag.id})
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [recipe.id],
+        )
+
+    def test_cursor_pagination(self):
+        recipes = [sample_recipe(self.user) for _ in range(3)]
+
+        first = self.client.get(RECIPES_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual(
+            [item['id'] for item in second.data['results']],
+            [recipes[2].id],
+        )
+
+    def test_verify_and_rebuild_command(self):
+        recipe = sample_recipe(self.user, title='fresh')
+        RecipeSummary.objects.filter(recipe=recipe).update(title='stale')
+
+        with self.assertRaises(CommandError):
+            call_command('recipe_summaries', 'verify', stdout=StringIO())
+        call_command('recipe_summaries', 'rebuild', stdout=StringIO())
+        call_command('recipe_summaries', 'verify', stdout=StringIO())
+
+        self.assertEqual(
+            RecipeSummary.objects.get(recipe=recipe).title, 'fresh',
+        )
+
+    @override_settings(RECIPE_SUMMARIES=False)
+    def test_not_maintained_when_disabled(self):
+        sample_recipe(self.user)
+
+        self.assertFalse(RecipeSummary.objects.exists())
@@ -70,7 +70,7 @@ class PrivateRecipesApiTest(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_recipe_detail_view(self):
         recipe = sample_recipe(self.user)
@@ -156,6 +156,45 @@ class PrivateRecipesApiTest(TestCase):
         self.assertEqual(recipe.time_minutes, payload['time_minutes'])
         self.assertEqual(recipe.price, payload['price'])
 
+    def test_filter_recipes_by_tags(self):
+        recipe1 = sample_recipe(user=self.user, title='curry')
+        recipe2 = sample_recipe(user=self.user, title='tahini')
+        recipe3 = sample_recipe(user=self.user, title='fish')
+        tag1 = sample_tag(user=self.user, name='vegan')
+        tag2 = sample_tag(user=self.user, name='vegetarian')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag2)
+
+        res = self.client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
+        titles = [recipe['title'] for recipe in res.data['results']]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(titles, [recipe1.title, recipe2.title])
+        self.assertNotIn(recipe3.title, titles)
+
+    def test_filter_recipes_by_tags_and_ingredients(self):
+        recipe1 = sample_recipe(user=self.user, title='omelette')
+        recipe2 = sample_recipe(user=self.user, title='salad')
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredient(user=self.user, name='eggs')
+        recipe1.tags.add(tag)
+        recipe1.ingredients.add(ingredient)
+        recipe2.tags.add(tag)
+
+        res = self.client.get(RECIPES_URL, {
+            'tags': str(tag.id),
+            'ingredients': str(ingredient.id),
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['id'], recipe1.id)
+
+    def test_filter_recipes_invalid_ids(self):
+        res = self.client.get(RECIPES_URL, {'tags': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class RecipeImageUploadTests(TestCase):
 
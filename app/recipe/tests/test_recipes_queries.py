@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def detail_url_generator(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def sample_recipe(user, index=0):
+    recipe = Recipe.objects.create(
+        user=user,
+        title=f'recipe {index}',
+        time_minutes=10,
+        price=5.00,
+    )
+    recipe.tags.add(Tag.objects.create(user=user, name=f'tag {index}'))
+    recipe.ingredients.add(
+        Ingredient.objects.create(user=user, name=f'ingredient {index}'),
+        Ingredient.objects.create(user=user, name=f'other {index}'),
+    )
+
+    return recipe
+
+
+class RecipeQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="queries@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_query_count_does_not_grow_with_recipes(self):
+        for index in range(10):
+            sample_recipe(self.user, index)
+
+        # recipes + ingredients prefetch + tags prefetch
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 10)
+        self.assertEqual(len(res.data['results'][0]['ingredients']), 2)
+        self.assertEqual(len(res.data['results'][0]['tags']), 1)
+
+    def test_detail_query_count(self):
+        recipe = sample_recipe(self.user)
+
+        with self.assertNumQueries(3):
+            res = self.client.get(detail_url_generator(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['ingredients']), 2)
+        self.assertEqual(res.data['tags'][0]['name'], 'tag 0')
@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+RECIPES_URL = reverse("recipe:recipe-list")
+RECIPES_BULK_URL = reverse("recipe:recipe-bulk")
+
+
+def recipe_payload(**kwargs):
+    payload = {
+        'title': 'soup',
+        'time_minutes': 20,
+        'price': '4.00',
+        'ingredients': [],
+    }
+    payload.update(kwargs)
+
+    return payload
+
+
+class UserRelatedFieldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="related@test.pl",
+            password="passwordpassword",
+        )
+        self.other = get_user_model().objects.create_user(
+            email="other@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _tag_lookups(self, queries):
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "core_tag" WHERE' in query['sql']
+        ]
+
+    def test_ids_are_resolved_with_one_query(self):
+        tags = [
+            Tag.objects.create(user=self.user, name=f'tag {index}')
+            for index in range(60)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(
+                RECIPES_URL,
+                recipe_payload(tags=[tag.id for tag in tags]),
+                format='json',
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(self._tag_lookups(queries)), 1)
+        self.assertEqual(sorted(res.data['tags']), [tag.id for tag in tags])
+
+    def test_ids_of_other_users_are_rejected_together(self):
+        own = Tag.objects.create(user=self.user, name='own')
+        foreign = [
+            Tag.objects.create(user=self.other, name=f'foreign {index}')
+            for index in range(2)
+        ]
+
+        res = self.client.post(
+            RECIPES_URL,
+            recipe_payload(tags=[own.id] + [tag.id for tag in foreign]),
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(res.data['tags']), 1)
+        for tag in foreign:
+            self.assertIn(str(tag.id), res.data['tags'][0])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_names_resolve_to_existing_or_new_objects(self):
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        Ingredient.objects.create(user=self.other, name='salt')
+
+        res = self.client.post(
+            RECIPES_URL,
+            recipe_payload(tags=['vegan', 'quick'], ingredients=['salt']),
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        quick = Tag.objects.get(user=self.user, name='quick')
+        salt = Ingredient.objects.get(user=self.user, name='salt')
+        self.assertEqual(sorted(res.data['tags']), [tag.id, quick.id])
+        self.assertEqual(res.data['ingredients'], [salt.id])
+
+    def test_bulk_creates_each_new_name_once(self):
+        payload = [
+            recipe_payload(title=f'recipe {index}', tags=['new', 'fresh'])
+            for index in range(5)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(self._tag_lookups(queries)), 1)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        new = Tag.objects.get(name='new')
+        self.assertEqual(new.recipe_set.count(), 5)
+
+    def test_bulk_reports_missing_ids_per_item(self):
+        tag = Tag.objects.create(user=self.user, name='own')
+        payload = [
+            recipe_payload(title='valid', tags=[tag.id]),
+            recipe_payload(title='invalid', tags=[tag.id, 999, 998]),
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('999, 998', res.data[1]['tags'][0])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_form_data(self):
+        tag = Tag.objects.create(user=self.user, name='vegan')
+
+        res = self.client.post(
+            RECIPES_URL, recipe_payload(tags=[tag.id, 'quick']),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['tags']), 2)
+        self.assertTrue(Tag.objects.filter(name='quick').exists())
+
+    def test_invalid_values(self):
+        for tags in ('vegan', [True], [{'id': 1}], ['']):
+            res = self.client.post(
+                RECIPES_URL, recipe_payload(tags=tags), format='json',
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('tags', res.data)
@@ -0,0 +1,140 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.cache import get_version
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+TAGS_BULK_URL = reverse("recipe:tag-bulk")
+
+
+def detail_url_generator(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+def sample_recipe(user, **kwargs):
+    defaults = {
+        'title': 'title',
+        'time_minutes': 10,
+        'price': 5.00,
+    }
+    defaults.update(kwargs)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class VersionedResponseCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="cache@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_repeated_list_is_served_from_cache(self):
+        sample_recipe(self.user)
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_write_invalidates_cached_list(self):
+        self.client.get(RECIPES_URL)
+
+        sample_recipe(self.user, title='new one')
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['title'], 'new one')
+
+    def test_relation_change_invalidates_cached_detail(self):
+        recipe = sample_recipe(self.user)
+        url = detail_url_generator(recipe.id)
+        self.client.get(url)
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+        res = self.client.get(url)
+
+        self.assertEqual(res.data['tags'][0]['name'], 'vegan')
+
+    def test_bulk_write_invalidates_cached_list(self):
+        self.client.get(TAGS_URL)
+
+        self.client.post(TAGS_BULK_URL, [{'name': 'bulk'}], format='json')
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.data['results'][0]['name'], 'bulk')
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_only_etag_is_a_validator(self):
+        # two writes within a second would share a Last-Modified date
+        res = self.client.get(TAGS_URL)
+        self.assertNotIn('Last-Modified', res)
+
+        res = self.client.get(
+            TAGS_URL, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60),
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_version_is_bumped_on_commit(self):
+        version = get_version(self.user.id)
+
+        with transaction.atomic():
+            Tag.objects.create(user=self.user, name='pending')
+            self.assertEqual(get_version(self.user.id), version)
+
+        self.assertNotEqual(get_version(self.user.id), version)
+
+    def test_rolled_back_write_keeps_version(self):
+        version = get_version(self.user.id)
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Tag.objects.create(user=self.user, name='rolled back')
+            raise RuntimeError()
+
+        self.assertEqual(get_version(self.user.id), version)
+
+    def test_stale_etag_returns_fresh_response(self):
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        Tag.objects.create(user=self.user, name='fresh')
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_cache_is_per_user(self):
+        Tag.objects.create(user=self.user, name='mine')
+        self.client.get(TAGS_URL)
+        other = get_user_model().objects.create_user(
+            email="other@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.data['results'], [])
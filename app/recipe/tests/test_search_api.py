@@ -0,0 +1,180 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, RecipeSearchTerm, Tag, Ingredient
+
+SEARCH_URL = reverse("recipe:recipe-search")
+RECIPES_BULK_URL = reverse("recipe:recipe-bulk")
+
+
+def sample_recipe(user, **kwargs):
+    defaults = {
+        'title': 'title',
+        'time_minutes': 10,
+        'price': 5.00,
+    }
+    defaults.update(kwargs)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeSearchApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="search@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def search(self, query):
+        res = self.client.get(SEARCH_URL, {'q': query})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res.data['results']
+
+    def test_title_matches_rank_above_relation_matches(self):
+        by_ingredient = sample_recipe(self.user, title='Stew')
+        by_ingredient.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Tomato'),
+        )
+        by_tag = sample_recipe(self.user, title='Salad')
+        by_tag.tags.add(Tag.objects.create(user=self.user, name='tomato'))
+        by_title = sample_recipe(self.user, title='Tomato soup')
+
+        results = self.search('tomato')
+
+        self.assertEqual(
+            [item['id'] for item in results],
+            [by_title.id, by_tag.id, by_ingredient.id],
+        )
+        self.assertGreater(results[0]['score'], results[1]['score'])
+
+    def test_every_term_must_match_as_prefix(self):
+        soup = sample_recipe(self.user, title='Tomato soup')
+        sample_recipe(self.user, title='Tomato salad')
+
+        results = self.search('tom sou')
+
+        self.assertEqual([item['id'] for item in results], [soup.id])
+
+    def test_exact_word_ranks_above_prefix(self):
+        prefix = sample_recipe(self.user, title='Tomatoes')
+        exact = sample_recipe(self.user, title='Tomato')
+
+        results = self.search('tomato')
+
+        self.assertEqual(
+            [item['id'] for item in results], [exact.id, prefix.id],
+        )
+
+    def test_search_is_limited_to_user(self):
+        other = get_user_model().objects.create_user(
+            email="other@test.pl",
+            password="passwordpassword",
+        )
+        sample_recipe(other, title='Tomato soup')
+
+        self.assertEqual(self.search('tomato'), [])
+
+    def test_empty_query_returns_nothing(self):
+        sample_recipe(self.user, title='Tomato soup')
+
+        self.assertEqual(self.search(''), [])
+
+    def test_renaming_tag_updates_index(self):
+        tag = Tag.objects.create(user=self.user, name='lunch')
+        recipe = sample_recipe(self.user, title='Soup')
+        recipe.tags.add(tag)
+
+        tag.name = 'dinner'
+        tag.save()
+
+        self.assertEqual(self.search('lunch'), [])
+        self.assertEqual(
+            [item['id'] for item in self.search('dinner')], [recipe.id],
+        )
+
+    def test_removed_relation_leaves_index(self):
+        tag = Tag.objects.create(user=self.user, name='lunch')
+        recipe = sample_recipe(self.user, title='Soup')
+        recipe.tags.add(tag)
+
+        tag.recipe_set.clear()
+
+        self.assertEqual(self.search('lunch'), [])
+
+    def test_bulk_created_recipes_are_indexed(self):
+        self.client.post(RECIPES_BULK_URL, [{
+            'title': 'Bulk pancakes',
+            'time_minutes': 5,
+            'price': '2.00',
+            'ingredients': [],
+            'tags': [],
+        }], format='json')
+
+        results = self.search('pancake')
+
+        self.assertEqual(results[0]['title'], 'Bulk pancakes')
+
+    def test_results_are_paginated(self):
+        for index in range(5):
+            recipe = sample_recipe(self.user, title=f'Soup {index}')
+            if index % 2:
+                recipe.tags.add(
+                    Tag.objects.create(user=self.user, name='soup'),
+                )
+
+        ids = []
+        res = self.client.get(SEARCH_URL, {'q': 'soup', 'page_size': 2})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', res.data)
+            self.assertLessEqual(len(res.data['results']), 2)
+            ids.extend(item['id'] for item in res.data['results'])
+            if res.data['next'] is None:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(ids, [
+            item['id'] for item in self.client.get(
+                SEARCH_URL, {'q': 'soup'},
+            ).data['results']
+        ])
+
+    def test_invalid_cursor(self):
+        res = self.client.get(SEARCH_URL, {'q': 'soup', 'cursor': 'bogus'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_index_rows_of_other_recipes_are_skipped(self):
+        other = get_user_model().objects.create_user(
+            email="other@test.pl",
+            password="passwordpassword",
+        )
+        foreign = sample_recipe(other, title='Soup')
+        RecipeSearchTerm.objects.create(
+            user=self.user, recipe=foreign, term='soup', weight=3,
+        )
+        mine = sample_recipe(self.user, title='Soup')
+
+        self.assertEqual(
+            [item['id'] for item in self.search('soup')], [mine.id],
+        )
+
+    def test_rebuild_command_reindexes_recipes(self):
+        recipe = sample_recipe(self.user, title='Tomato soup')
+        RecipeSearchTerm.objects.all().delete()
+
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual(
+            [item['id'] for item in self.search('tomato')], [recipe.id],
+        )
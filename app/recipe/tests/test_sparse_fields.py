@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import summary
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def detail_url_generator(recipe_id):
+    return reverse("recipe:recipe-detail", args=[recipe_id])
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="fields@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='vegan')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user, name='tofu',
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=30, price=7.50,
+            link='https://example.com/curry',
+        )
+        self.recipe.tags.add(self.tag)
+        self.recipe.ingredients.add(self.ingredient)
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+
+        return res, [query['sql'] for query in queries.captured_queries]
+
+    def test_list_fields(self):
+        res, queries = self.get(RECIPES_URL, fields='id,title')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'],
+                         [{'id': self.recipe.id, 'title': 'Curry'}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"price"', queries[0])
+        self.assertNotIn('"link"', queries[0])
+
+    def test_list_expand(self):
+        res, queries = self.get(RECIPES_URL, expand='tags')
+
+        item = res.data['results'][0]
+        self.assertEqual(item['tags'], [{'id': self.tag.id, 'name': 'vegan'}])
+        self.assertEqual(item['ingredients'], [self.ingredient.id])
+        self.assertEqual(len(queries), 3)
+
+    def test_list_fields_with_expanded_relation(self):
+        res, queries = self.get(RECIPES_URL, fields='id,ingredients',
+                                expand='ingredients')
+
+        self.assertEqual(res.data['results'], [{
+            'id': self.recipe.id,
+            'ingredients': [{'id': self.ingredient.id, 'name': 'tofu'}],
+        }])
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('core_recipe_tags' in sql for sql in queries))
+
+    def test_detail_fields(self):
+        res, queries = self.get(detail_url_generator(self.recipe.id),
+                                fields='title,image_status')
+
+        self.assertEqual(res.data, {
+            'title': 'Curry', 'image_status': self.recipe.image_status,
+        })
+        self.assertEqual(len(queries), 1)
+
+    def test_detail_keeps_nested_relations(self):
+        res, _ = self.get(detail_url_generator(self.recipe.id),
+                          fields='id,tags')
+
+        self.assertEqual(res.data['tags'],
+                         [{'id': self.tag.id, 'name': 'vegan'}])
+
+    def test_search_fields(self):
+        res, _ = self.get(reverse('recipe:recipe-search'), q='curry',
+                          fields='title')
+
+        self.assertEqual(set(res.data['results'][0]), {'title', 'score'})
+
+    def test_unknown_fields(self):
+        for params in ({'fields': 'id,secret'}, {'expand': 'user'}):
+            res, _ = self.get(RECIPES_URL, **params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_SUMMARIES=True)
+    def test_summary_list(self):
+        summary.rebuild([self.recipe.id])
+
+        res, queries = self.get(RECIPES_URL, fields='id,title,tags',
+                                expand='tags')
+
+        self.assertEqual(res.data['results'], [{
+            'id': self.recipe.id,
+            'title': 'Curry',
+            'tags': [{'id': self.tag.id, 'name': 'vegan'}],
+        }])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"ingredients"', queries[0])
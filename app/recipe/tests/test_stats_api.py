@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+STATS_URL = reverse("recipe:recipe-stats")
+
+
+def sample_recipe(user, **kwargs):
+    defaults = {
+        'title': 'title',
+        'time_minutes': 10,
+        'price': 5.00,
+    }
+    defaults.update(kwargs)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeStatsApiTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="stats@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def stats(self, **params):
+        res = self.client.get(STATS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res.data
+
+    def test_distributions(self):
+        for minutes, price in ((5, '2.00'), (20, '8.00'), (45, '12.50'),
+                               (90, '60.00')):
+            sample_recipe(self.user, time_minutes=minutes, price=price)
+
+        data = self.stats()
+
+        self.assertEqual(data['recipes'], 4)
+        self.assertEqual(data['price']['min'], '2.00')
+        self.assertEqual(data['price']['max'], '60.00')
+        self.assertEqual(data['price']['avg'], '20.63')
+        self.assertEqual(data['price']['p50'], '8.00')
+        self.assertEqual(data['price']['p90'], '60.00')
+        self.assertEqual(data['time_minutes']['avg'], 40.0)
+        self.assertEqual(data['time_minutes']['p25'], 5)
+        self.assertEqual(
+            [bucket['count'] for bucket in data['price']['histogram']],
+            [1, 1, 1, 0, 1],
+        )
+        self.assertEqual(data['time_minutes']['histogram'][0], {
+            'min': None, 'max': 15, 'count': 1,
+        })
+
+    def test_usage_counts(self):
+        vegan = Tag.objects.create(user=self.user, name='vegan')
+        quick = Tag.objects.create(user=self.user, name='quick')
+        rice = Ingredient.objects.create(user=self.user, name='rice')
+        salt = Ingredient.objects.create(user=self.user, name='salt')
+        for _ in range(2):
+            recipe = sample_recipe(self.user)
+            recipe.tags.add(quick)
+            recipe.ingredients.add(rice, salt)
+        sample_recipe(self.user).ingredients.add(salt)
+
+        data = self.stats(top=1)
+
+        self.assertEqual(data['tags'], [
+            {'id': quick.id, 'name': 'quick', 'recipes': 2},
+            {'id': vegan.id, 'name': 'vegan', 'recipes': 0},
+        ])
+        self.assertEqual(data['ingredients'], [
+            {'id': salt.id, 'name': 'salt', 'recipes': 3},
+        ])
+
+    def test_empty_account(self):
+        data = self.stats()
+
+        self.assertEqual(data['recipes'], 0)
+        self.assertIsNone(data['price']['p50'])
+        self.assertEqual(data['tags'], [])
+
+    def test_sections_are_materialized(self):
+        sample_recipe(self.user)
+        self.stats()
+
+        with self.assertNumQueries(0):
+            # a different url misses the response cache
+            self.stats(top=5)
+
+    def test_write_refreshes_only_affected_sections(self):
+        recipe = sample_recipe(self.user)
+        self.stats()
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='new'))
+        with self.assertNumQueries(1):
+            # only the tag counts are recomputed
+            data = self.stats()
+
+        self.assertEqual(data['tags'][0]['recipes'], 1)
+
+    def test_sections_are_invalidated_on_commit(self):
+        sample_recipe(self.user)
+        self.stats()
+
+        with transaction.atomic():
+            sample_recipe(self.user)
+            # what a concurrent read sees until the write commits
+            self.assertEqual(self.stats(top=5)['recipes'], 1)
+
+        self.assertEqual(self.stats(top=6)['recipes'], 2)
+
+    def test_stats_are_per_user(self):
+        other = get_user_model().objects.create_user(
+            email="other@test.pl",
+            password="passwordpassword",
+        )
+        sample_recipe(other)
+
+        self.assertEqual(self.stats()['recipes'], 0)
@@ -0,0 +1,239 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient, SyncState, Tombstone
+
+SYNC_URL = reverse("recipe:sync")
+RECIPES_BULK_URL = reverse("recipe:recipe-bulk")
+
+
+def sample_recipe(user, **kwargs):
+    defaults = {
+        'title': 'title',
+        'time_minutes': 10,
+        'price': 5.00,
+    }
+    defaults.update(kwargs)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class SyncApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="sync@test.pl",
+            password="passwordpassword",
+        )
+        self.client.force_authenticate(self.user)
+
+    def _sync(self, since=None):
+        res = self.client.get(
+            SYNC_URL, {} if since is None else {'since': since},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res.data
+
+    def test_login_required(self):
+        res = APIClient().get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_full_sync(self):
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='salt')
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(tag)
+        other = get_user_model().objects.create_user(
+            email="other@test.pl",
+            password="passwordpassword",
+        )
+        Tag.objects.create(user=other, name='foreign')
+
+        data = self._sync()
+
+        self.assertEqual(data['tags'], [{'id': tag.id, 'name': 'vegan'}])
+        self.assertEqual(
+            data['ingredients'], [{'id': ingredient.id, 'name': 'salt'}],
+        )
+        self.assertEqual(len(data['recipes']), 1)
+        self.assertEqual(data['recipes'][0]['tags'], [tag.id])
+        self.assertFalse(data['more'])
+        self.assertEqual(
+            data['cursor'], SyncState.objects.get(user=self.user).sequence,
+        )
+
+    def test_only_changes_after_cursor(self):
+        Tag.objects.create(user=self.user, name='vegan')
+        recipe = sample_recipe(self.user)
+        cursor = self._sync()['cursor']
+
+        self.assertEqual(self._sync(cursor)['recipes'], [])
+
+        recipe.title = 'renamed'
+        recipe.save()
+        data = self._sync(cursor)
+
+        self.assertEqual(data['tags'], [])
+        self.assertEqual(
+            [item['title'] for item in data['recipes']], ['renamed'],
+        )
+        self.assertGreater(data['cursor'], cursor)
+
+    def test_relation_changes_bump_recipes(self):
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        recipe = sample_recipe(self.user)
+        cursor = self._sync()['cursor']
+
+        tag.recipe_set.add(recipe)
+        data = self._sync(cursor)
+
+        self.assertEqual(data['recipes'][0]['tags'], [tag.id])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.sequence, data['cursor'])
+
+    def test_deletes_leave_tombstones(self):
+        tag = Tag.objects.create(user=self.user, name='vegan')
+        recipe = sample_recipe(self.user, title='tagged')
+        recipe.tags.add(tag)
+        deleted = sample_recipe(self.user, title='deleted')
+        cursor = self._sync()['cursor']
+        tag_id, deleted_id = tag.id, deleted.id
+
+        deleted.delete()
+        tag.delete()
+        data = self._sync(cursor)
+
+        self.assertEqual(data['deleted'], {
+            'tags': [tag_id], 'ingredients': [], 'recipes': [deleted_id],
+        })
+        # the tag is gone from the recipes that had it
+        self.assertEqual(data['recipes'][0]['tags'], [])
+
+    def test_bulk_delete_buries_with_one_sequence(self):
+        recipes = [sample_recipe(self.user) for _ in range(3)]
+        cursor = self._sync()['cursor']
+
+        res = self.client.delete(
+            RECIPES_BULK_URL, [recipe.id for recipe in recipes],
+            format='json',
+        )
+        data = self._sync(cursor)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(data['deleted']['recipes']),
+            sorted(recipe.id for recipe in recipes),
+        )
+        self.assertEqual(data['cursor'], cursor + 1)
+        self.assertEqual(
+            set(Tombstone.objects.values_list('sequence', flat=True)),
+            {cursor + 1},
+        )
+
+    def test_bulk_update_locks_sync_state_first(self):
+        recipe = sample_recipe(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch(
+                RECIPES_BULK_URL, [{'id': recipe.id, 'title': 'new'}],
+                format='json',
+            )
+
+        statements = [
+            query['sql'] for query in queries
+            if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))
+        ]
+        self.assertIn('"core_syncstate"', statements[0])
+
+    def test_full_sync_leaves_out_tombstones(self):
+        sample_recipe(self.user).delete()
+
+        data = self._sync()
+
+        self.assertEqual(data['deleted']['recipes'], [])
+        self.assertTrue(Tombstone.objects.filter(user=self.user).exists())
+
+    def test_bulk_writes_are_synced(self):
+        tag = Tag.objects.create(user=self.user, name='quick')
+        cursor = self._sync()['cursor']
+        payload = [
+            {
+                'title': f'recipe {index}',
+                'time_minutes': 5,
+                'price': '2.50',
+                'tags': [tag.id, 'new'],
+                'ingredients': [],
+            }
+            for index in range(3)
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+        data = self._sync(cursor)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(data['recipes']), 3)
+        self.assertEqual([item['name'] for item in data['tags']], ['new'])
+
+    @override_settings(SYNC_PAGE_SIZE=2)
+    def test_pages_never_split_a_write(self):
+        first = sample_recipe(self.user, title='first')
+        self.client.post(RECIPES_BULK_URL, [
+            {
+                'title': f'bulk {index}',
+                'time_minutes': 5,
+                'price': '2.50',
+                'tags': [],
+                'ingredients': [],
+            }
+            for index in range(3)
+        ], format='json')
+        last = sample_recipe(self.user, title='last')
+
+        pages = [self._sync()]
+        while pages[-1]['more']:
+            pages.append(self._sync(pages[-1]['cursor']))
+
+        titles = [
+            [item['title'] for item in page['recipes']] for page in pages
+        ]
+        self.assertEqual(titles[0], ['first', 'bulk 0', 'bulk 1', 'bulk 2'])
+        self.assertEqual(titles[1], ['last'])
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(pages[-1]['cursor'], Recipe.objects.get(
+            id=last.id,
+        ).sequence)
+        self.assertLess(
+            Recipe.objects.get(id=first.id).sequence, pages[0]['cursor'],
+        )
+
+    def test_reads_from_primary(self):
+        with mock.patch('core.db.router.set_replica_reads') as spy:
+            self._sync()
+
+        spy.assert_not_called()
+
+    def test_invalid_cursor(self):
+        for since in ('abc', '-1', str(10 ** 6)):
+            res = self.client.get(SYNC_URL, {'since': since})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('since', res.data)
+
+    def test_deleting_user_removes_sync_state(self):
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='vegan'))
+        sample_recipe(self.user).delete()
+
+        self.user.delete()
+
+        self.assertFalse(Tombstone.objects.exists())
+        self.assertFalse(SyncState.objects.exists())
@@ -5,7 +5,7 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import Tag, Recipe
 
 from recipe.serializers import TagSerializer
 
@@ -56,7 +56,7 @@ class PrivateTagAPITests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
 
     def test_create_tags_successfully(self):
         payload = {
@@ -81,3 +81,44 @@ class PrivateTagAPITests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_retrieve_tags_assigned_to_recipes(self):
+        tag1 = Tag.objects.create(user=self.user, name="breakfast")
+        tag2 = Tag.objects.create(user=self.user, name="lunch")
+        recipe = Recipe.objects.create(
+            title="eggs",
+            time_minutes=10,
+            price=5.00,
+            user=self.user,
+        )
+        recipe.tags.add(tag1)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+        names = [tag['name'] for tag in res.data['results']]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(tag1.name, names)
+        self.assertNotIn(tag2.name, names)
+
+    def test_retrieve_tags_assigned_unique(self):
+        tag = Tag.objects.create(user=self.user, name="breakfast")
+        Tag.objects.create(user=self.user, name="lunch")
+        for title in ("pancakes", "porridge"):
+            recipe = Recipe.objects.create(
+                title=title,
+                time_minutes=5,
+                price=3.00,
+                user=self.user,
+            )
+            recipe.tags.add(tag)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_retrieve_tags_assigned_only_false(self):
+        Tag.objects.create(user=self.user, name="breakfast")
+
+        for value in ('0', 'False', 'no', 'OFF'):
+            res = self.client.get(TAGS_URL, {'assigned_only': value})
+
+            self.assertEqual(len(res.data['results']), 1)
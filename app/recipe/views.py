@@ -1,52 +1,369 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Tag, Ingredient, Recipe
-from recipe import serializers
+from core.bulk import delete_without_signals
+from core.db.router import ReplicaReadsMixin
+from core.models import Tag, Ingredient, Recipe, RecipeSummary
+from core.signals import bulk_changed
+from recipe import images, matching, serializers, stats, summary, sync
+from recipe.export import EXPORT_FORMATS, IgnoreClientContentNegotiation, \
+    export_response
+from recipe.cache import VersionedCacheMixin
+from recipe.search import SearchPagination, search
+from recipe.pagination import TagCursorPagination, \
+    IngredientCursorPagination, RecipeCursorPagination, \
+    RecipeSummaryCursorPagination
 from recipe.serializers import IngredientSerializer, RecipeSerializer
+from user.authentication import CachedTokenAuthentication
 
 
-class TagViewSet(viewsets.GenericViewSet,
-                 mixins.ListModelMixin,
-                 mixins.CreateModelMixin):
-    serializer_class = serializers.TagSerializer
-    authentication_classes = (TokenAuthentication,)
+COOKABLE_LIMIT = 20
+COOKABLE_MAX_LIMIT = 100
+STATS_TOP_INGREDIENTS = 10
+STATS_MAX_TOP_INGREDIENTS = 100
+# read actions honouring ?fields= and ?expand=
+SPARSE_FIELDS_ACTIONS = ('list', 'retrieve', 'search', 'cookable')
+RELATED_MODELS = {'ingredients': Ingredient, 'tags': Tag}
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+class BulkModelMixin:
+    @action(detail=False, methods=['POST', 'PATCH', 'DELETE'],
+            url_path='bulk')
+    def bulk(self, request):
+        if request.method == 'POST':
+            return self._bulk_create(request)
+        elif request.method == 'PATCH':
+            return self._bulk_update(request)
+
+        return self._bulk_destroy(request)
+
+    def _bulk_create(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic(), summary.deferred():
+            sync.lock(request.user.id)
+            instances = serializer.save(user=request.user)
+            self._send_bulk_changed(instances)
+
+        return self._bulk_response(instances, status.HTTP_201_CREATED)
+
+    def _bulk_update(self, request):
+        ids = self._bulk_ids([
+            item.get('id') if isinstance(item, dict) else None
+            for item in self._bulk_list(request.data)
+        ])
+
+        with transaction.atomic(), summary.deferred():
+            sync.lock(request.user.id)
+            found = self.get_queryset().select_for_update().in_bulk(ids)
+            missing = [
+                {} if pk in found else {'id': ['Not found.']} for pk in ids
+            ]
+            if len(found) != len(ids):
+                raise ValidationError(missing)
+
+            serializer = self.get_serializer(
+                [found[pk] for pk in ids],
+                data=request.data,
+                many=True,
+                partial=True,
+            )
+            serializer.is_valid(raise_exception=True)
+            instances = serializer.save()
+            self._send_bulk_changed(instances)
+
+        return self._bulk_response(instances, status.HTTP_200_OK)
+
+    def _bulk_destroy(self, request):
+        ids = self._bulk_ids(self._bulk_list(request.data))
+
+        model = self.queryset.model
+        with transaction.atomic():
+            sync.lock(request.user.id)
+            found = set(
+                self.get_queryset().filter(id__in=ids)
+                .values_list('id', flat=True)
+            )
+            linked = self._linked_recipe_ids(found)
+            delete_without_signals(model.objects.filter(id__in=found))
+            bulk_changed.send(
+                sender=model,
+                user_id=request.user.id,
+                ids=list(found),
+                deleted=True,
+            )
+            if linked:
+                bulk_changed.send(
+                    sender=Recipe, user_id=request.user.id, ids=linked,
+                )
+
+        return Response(
+            [{'id': pk, 'deleted': pk in found} for pk in ids],
+            status=status.HTTP_200_OK,
+        )
+
+    def _linked_recipe_ids(self, ids):
+        """Recipes left changed by deleting the objects with these ids."""
+        return []
+
+    def _send_bulk_changed(self, instances):
+        bulk_changed.send(
+            sender=self.queryset.model,
+            user_id=self.request.user.id,
+            ids=[instance.id for instance in instances],
+        )
+
+    def _bulk_response(self, instances, response_status):
+        ids = [instance.id for instance in instances]
+        fetched = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [fetched[pk] for pk in ids],
+            many=True,
+        )
+
+        return Response(serializer.data, status=response_status)
+
+    def _bulk_list(self, data):
+        if not isinstance(data, list):
+            raise ValidationError(
+                {'non_field_errors': ['Expected a list of items.']}
+            )
+
+        return data
+
+    def _bulk_ids(self, values):
+        errors = []
+        for value in values:
+            valid = isinstance(value, int) and not isinstance(value, bool)
+            errors.append({} if valid else {'id': ['A valid id is required.']})
+        if any(errors):
+            raise ValidationError(errors)
+
+        if len(set(values)) != len(values):
+            raise ValidationError(
+                {'non_field_errors': ['Duplicate ids are not allowed.']}
+            )
+
+        return values
+
+
+class BaseRecipeAttrViewSet(ReplicaReadsMixin,
+                            VersionedCacheMixin,
+                            BulkModelMixin,
+                            viewsets.GenericViewSet,
+                            mixins.ListModelMixin,
+                            mixins.CreateModelMixin):
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
-    queryset = Tag.objects.all()
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        queryset = self.queryset.filter(user=self.request.user)
+        assigned_only = self.request.query_params.get('assigned_only')
+
+        if assigned_only and assigned_only.lower() not in FALSE_VALUES:
+            queryset = queryset.filter(id__in=self._assigned_ids())
+
+        return queryset
+
+    def _assigned_ids(self):
+        """Ids used by a recipe, read from the relation table alone."""
+        field = self._recipe_field()
+
+        return field.remote_field.through.objects.values(
+            field.m2m_reverse_field_name(),
+        )
+
+    def _linked_recipe_ids(self, ids):
+        field = self._recipe_field()
+
+        return list(
+            field.remote_field.through.objects
+            .filter(**{f'{field.m2m_reverse_field_name()}__in': ids})
+            .values_list('recipe_id', flat=True)
+            .distinct()
+        )
+
+    def _recipe_field(self):
+        model = self.queryset.model
+
+        return next(
+            field for field in Recipe._meta.many_to_many
+            if field.related_model is model
+        )
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class IngredientViewSet(viewsets.GenericViewSet,
-                        mixins.ListModelMixin,
-                        mixins.CreateModelMixin):
-    serializer_class = IngredientSerializer
-    authentication_classes = (TokenAuthentication,)
-    permission_classes = (IsAuthenticated,)
-    queryset = Ingredient.objects.all()
+class TagViewSet(BaseRecipeAttrViewSet):
+    serializer_class = serializers.TagSerializer
+    pagination_class = TagCursorPagination
+    queryset = Tag.objects.all()
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        return super().get_queryset().order_by('-name')
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
 
+class IngredientViewSet(BaseRecipeAttrViewSet):
+    serializer_class = IngredientSerializer
+    pagination_class = IngredientCursorPagination
+    queryset = Ingredient.objects.all()
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(ReplicaReadsMixin,
+                    VersionedCacheMixin,
+                    BulkModelMixin,
+                    viewsets.ModelViewSet):
     serializer_class = RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = RecipeCursorPagination
+
+    @property
+    def throttle_scope(self):
+        # read / write by method for the other actions
+        return 'upload' if self.action == 'upload_image' else None
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+
+        if self.action == 'list':
+            queryset = self._filter_by_related(queryset)
+
+        return self._prefetch_for_action(queryset)
+
+    def _filter_by_related(self, queryset):
+        # Semi-joins against the through tables never duplicate recipes, so
+        # no DISTINCT over the recipe columns is needed.
+        tag_ids = self._params_to_ints('tags')
+        if tag_ids:
+            queryset = queryset.filter(
+                id__in=Recipe.tags.through.objects.filter(
+                    tag_id__in=tag_ids,
+                ).values('recipe_id'),
+            )
+
+        ingredient_ids = self._params_to_ints('ingredients')
+        if ingredient_ids:
+            queryset = queryset.filter(
+                id__in=Recipe.ingredients.through.objects.filter(
+                    ingredient_id__in=ingredient_ids,
+                ).values('recipe_id'),
+            )
+
+        return queryset
+
+    def _params_to_ints(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return []
+
+        try:
+            return [int(item) for item in value.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {name: 'Expected a comma separated list of ids.'}
+            )
+
+    def _bounded_int_param(self, name, default, maximum):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: 'Expected a number.'})
+
+        return min(max(value, 1), maximum)
+
+    def _prefetch_for_action(self, queryset):
+        if self.action not in ('list', 'bulk', 'search', 'cookable',
+                               'retrieve'):
+            return queryset
+
+        fields, expand = self._sparse_fieldset()
+        if fields is not None:
+            # the cursor pagination orders by id
+            queryset = queryset.only('id', *(
+                name for name in fields if name not in RELATED_MODELS
+            ))
+        if self.action == 'retrieve':
+            expand = RELATED_MODELS
+
+        return queryset.prefetch_related(*(
+            Prefetch(name, model.objects.only(
+                *(('id', 'name') if name in expand else ('id',))
+            ))
+            for name, model in RELATED_MODELS.items()
+            if fields is None or name in fields
+        ))
+
+    def _sparse_fieldset(self):
+        """Fields asked for with ?fields=, None for all of them, and the
+        relations to expand asked for with ?expand=."""
+        if self.action not in SPARSE_FIELDS_ACTIONS:
+            return None, frozenset()
+
+        known = self.get_serializer_class().Meta.fields
+        fields = self._names_param('fields', known)
+        expand = self._names_param('expand', RELATED_MODELS) or frozenset()
+
+        return fields, expand
+
+    def _names_param(self, name, allowed):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+
+        names = frozenset(value.split(','))
+        unknown = names.difference(allowed)
+        if unknown:
+            raise ValidationError({
+                name: f'Unknown fields: {", ".join(sorted(unknown))}.'
+            })
+
+        return names
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'], context['expand'] = self._sparse_fieldset()
+
+        return context
+
+    def list(self, request, *args, **kwargs):
+        if settings.RECIPE_SUMMARIES and not (
+                request.query_params.get('tags') or
+                request.query_params.get('ingredients')):
+            return self.cached_response(self._list_summaries, request)
+
+        return super().list(request, *args, **kwargs)
+
+    def _list_summaries(self, request):
+        paginator = RecipeSummaryCursorPagination()
+        summaries = RecipeSummary.objects.filter(user=request.user)
+        fields, _ = self._sparse_fieldset()
+        if fields is not None:
+            summaries = summaries.only('recipe_id', *(
+                name for name in fields if name != 'id'
+            ))
+        page = paginator.paginate_queryset(summaries, request, view=self)
+        serializer = serializers.RecipeSummarySerializer(
+            page, many=True, context=self.get_serializer_context(),
+        )
+
+        return paginator.get_paginated_response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -57,7 +374,92 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return self.serializer_class
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        with transaction.atomic(), summary.deferred():
+            sync.lock(self.request.user.id)
+            serializer.save(user=self.request.user)
+
+    def perform_update(self, serializer):
+        with transaction.atomic(), summary.deferred():
+            sync.lock(self.request.user.id)
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            sync.lock(self.request.user.id)
+            instance.delete()
+
+    @action(detail=False, methods=['GET'])
+    def cookable(self, request):
+        return self.cached_response(self._cookable, request)
+
+    def _cookable(self, request):
+        matches = matching.store.rank(
+            request.user.id,
+            self._params_to_ints('ingredients'),
+            self._bounded_int_param('limit', COOKABLE_LIMIT,
+                                    COOKABLE_MAX_LIMIT),
+        )
+        recipes = self.get_queryset().in_bulk(
+            [match.recipe_id for match in matches]
+        )
+        matches = [match for match in matches if match.recipe_id in recipes]
+        serializer = self.get_serializer(
+            [recipes[match.recipe_id] for match in matches], many=True,
+        )
+        for item, match in zip(serializer.data, matches):
+            item['missing_ingredients'] = match.missing
+
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['GET'])
+    def stats(self, request):
+        return self.cached_response(self._stats, request)
+
+    def _stats(self, request):
+        data = {
+            name: stats.section(request.user.id, name)
+            for name in stats.SECTIONS
+        }
+        data['recipes'] = data['price']['count']
+        data['ingredients'] = data['ingredients'][:self._bounded_int_param(
+            'top', STATS_TOP_INGREDIENTS, STATS_MAX_TOP_INGREDIENTS,
+        )]
+
+        return Response(data)
+
+    @action(detail=False, methods=['GET'])
+    def search(self, request):
+        return self.cached_response(self._search, request)
+
+    def _search(self, request):
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(
+            search(request.user, request.query_params.get('q')),
+            request,
+            view=self,
+        )
+        recipes = self.get_queryset().in_bulk([pk for pk, _ in page])
+        # index rows may outlive their recipe until it is reindexed
+        page = [(pk, score) for pk, score in page if pk in recipes]
+        serializer = self.get_serializer(
+            [recipes[pk] for pk, _ in page], many=True,
+        )
+        for item, (_, score) in zip(serializer.data, page):
+            item['score'] = score
+
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['GET'],
+            content_negotiation_class=IgnoreClientContentNegotiation)
+    def export(self, request):
+        export_format = request.query_params.get('export_format', 'jsonl')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({
+                'export_format': f'Expected one of: '
+                                 f'{", ".join(sorted(EXPORT_FORMATS))}.'
+            })
+
+        return export_response(self.get_queryset(), export_format)
 
     @action(detail=True, methods=['POST'], url_path='upload-image')
     def upload_image(self, request, pk=None):
@@ -68,7 +470,21 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                sync.lock(request.user.id)
+                # a running job writes only while the image is the one it
+                # started from, so it cannot bring back the replaced files
+                serializer.instance = recipe = Recipe.objects \
+                    .select_for_update() \
+                    .get(id=recipe.id)
+                replaced = images.image_files(recipe)
+                serializer.save(
+                    image_status=Recipe.IMAGE_PENDING,
+                    image_thumbnail=None,
+                    image_webp=None,
+                )
+                images.delete_on_commit(recipe.image.storage, replaced)
+            images.enqueue(recipe.id)
 
             return Response(
                 serializer.data,
@@ -79,3 +495,46 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+
+class SyncView(APIView):
+    """Tags, ingredients and recipes changed since the `since` cursor of an
+    earlier response, all of them without one.
+
+    Clients drop the `deleted` ids before applying the changed rows, and
+    call again with the returned cursor while `more` is true. Read from the
+    primary: a replica behind the one the cursor came from would skip the
+    changes it has not received yet for good.
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        since = request.query_params.get('since') or '0'
+        if not since.isdigit():
+            raise ValidationError({'since': 'Expected a sync cursor.'})
+
+        try:
+            changes = sync.changes(
+                request.user.id, int(since), settings.SYNC_PAGE_SIZE,
+            )
+        except sync.UnknownCursor:
+            raise ValidationError({'since': 'Unknown cursor, sync again '
+                                            'without one.'})
+
+        context = {'request': request, 'view': self}
+
+        return Response({
+            'cursor': changes['cursor'],
+            'more': changes['more'],
+            'tags': serializers.TagSerializer(
+                changes['tags'], many=True, context=context,
+            ).data,
+            'ingredients': IngredientSerializer(
+                changes['ingredients'], many=True, context=context,
+            ).data,
+            'recipes': RecipeSerializer(
+                changes['recipes'], many=True, context=context,
+            ).data,
+            'deleted': changes['deleted'],
+        })
@@ -0,0 +1,32 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+
+def token_cache_key(key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+
+    return f'auth:token:{digest}'
+
+
+def invalidate_token_cache(*keys):
+    cache.delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        user, token = super().authenticate_credentials(key)
+        cache.set(
+            cache_key,
+            (user, token),
+            settings.TOKEN_AUTH_CACHE_TIMEOUT,
+        )
+
+        return user, token
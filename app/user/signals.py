@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_token_cache
+
+
+def invalidate_on_commit(*keys):
+    # earlier, a concurrent request could cache the old row again
+    transaction.on_commit(lambda: invalidate_token_cache(*keys))
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_on_commit(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    if created:
+        return
+
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    invalidate_on_commit(*keys)
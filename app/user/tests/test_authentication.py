@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import token_cache_key
+
+USER_URL = reverse("user:main")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+class CachedTokenAuthenticationTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="token@test.pl",
+            password="passwordpassword",
+            name="name",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_is_cached(self):
+        self.client.get(USER_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(USER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(TAGS_URL)
+
+        self.token.delete()
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(TAGS_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_is_invalidated_on_commit(self):
+        self.client.get(TAGS_URL)
+        cached = cache.get(token_cache_key(self.token.key))
+
+        with transaction.atomic():
+            self.user.is_active = False
+            self.user.save()
+            # what a concurrent request caches until the write commits
+            cache.set(token_cache_key(self.token.key), cached)
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates_cache(self):
+        self.client.get(USER_URL)
+        self.assertIsNotNone(cache.get(token_cache_key(self.token.key)))
+
+        res = self.client.patch(USER_URL, {'password': 'newpassword123'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(cache.get(token_cache_key(self.token.key)))
+
+    def test_invalid_token_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(USER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)